@@ -14,8 +14,6 @@ Example:
 import os
 import sys
 import django
-import requests
-import time
 from pathlib import Path
 
 # Setup Django environment
@@ -24,24 +22,16 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cube_voting.settings')
 django.setup()
 
 from cards.models import Card
+from cards.scryfall import get_client
+
+# Number of concurrent Scryfall lookups; the shared client keeps the total under Scryfall's rate limit
+FETCH_WORKERS = 8
 
 
 def search_card_by_name(card_name):
     """Search for a card by name using Scryfall API"""
     try:
-        # Try exact match first
-        response = requests.get('https://api.scryfall.com/cards/named', 
-                              params={'exact': card_name})
-        if response.status_code == 200:
-            return response.json()
-        
-        # Try fuzzy search if exact match fails
-        response = requests.get('https://api.scryfall.com/cards/named', 
-                              params={'fuzzy': card_name})
-        if response.status_code == 200:
-            return response.json()
-        
-        return None
+        return get_client().card_by_name(card_name)
     except Exception as e:
         print(f"Error searching for '{card_name}': {e}")
         return None
@@ -50,24 +40,20 @@ def search_card_by_name(card_name):
 def search_card_by_url(url):
     """Search for a card by Scryfall URL"""
     try:
-        if '/card/' in url:
-            parts = url.split('/card/')
-            if len(parts) > 1:
-                # Get everything after /card/ and remove any query parameters
-                full_path = parts[1].split('?')[0]
-                # Split by '/' and take only set and collector number (first 2 parts)
-                path_parts = full_path.split('/')
-                if len(path_parts) >= 2:
-                    card_path = f"{path_parts[0]}/{path_parts[1]}"
-                    response = requests.get(f'https://api.scryfall.com/cards/{card_path}')
-                    if response.status_code == 200:
-                        return response.json()
-        return None
+        return get_client().card_by_url(url)
     except Exception as e:
         print(f"Error fetching card from URL '{url}': {e}")
         return None
 
 
+def search_card(line):
+    """Search for a card by name or Scryfall URL"""
+    # Determine if it's a URL or card name
+    if 'scryfall.com' in line:
+        return search_card_by_url(line)
+    return search_card_by_name(line)
+
+
 def add_card_to_database(card_data):
     """Add a card to the database if it doesn't already exist"""
     try:
@@ -111,16 +97,19 @@ def process_file(filename):
     total_lines = len(lines)
     print(f"Found {total_lines} entries to process\n")
     
-    for i, line in enumerate(lines, 1):
+    # Look up every line in batches of 75 via the collection API; only misses fall back to
+    # (concurrent) fuzzy lookups. Writes stay on this thread.
+    print("Fetching card data from Scryfall...")
+    try:
+        results = get_client().resolve_lines(lines, workers=FETCH_WORKERS)
+    except Exception as e:
+        print(f"Batch lookup failed ({e}), falling back to one request per card")
+        results = get_client().fetch_all(search_card, lines, workers=FETCH_WORKERS)
+    
+    for i, (line, card_data) in enumerate(zip(lines, results), 1):
         print(f"[{i}/{total_lines}] Processing: {line}")
         
-        # Determine if it's a URL or card name
-        if 'scryfall.com' in line:
-            card_data = search_card_by_url(line)
-        else:
-            card_data = search_card_by_name(line)
-        
-        if card_data:
+        if card_data and not isinstance(card_data, Exception):
             success = add_card_to_database(card_data)
             if success:
                 added_count += 1
@@ -129,14 +118,6 @@ def process_file(filename):
         else:
             print(f"  ✗ Could not find card: {line}")
             error_count += 1
-        
-        # Rate limiting - be nice to Scryfall's API
-        time.sleep(0.1)
-        
-        # Add a longer pause every 10 requests
-        if i % 10 == 0:
-            print("  Pausing briefly to respect rate limits...")
-            time.sleep(1)
     
     print("\n" + "=" * 50)
     print("BULK IMPORT COMPLETE")
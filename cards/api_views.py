@@ -1,9 +1,53 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from .kernel_moves import apply_moves
+from .kernel_order import move_kernel, next_kernel_order, reorder_kernels
 from .models import Card, Kernel, KernelCard, CandidateCard
-from .serializers import CardSerializer, KernelSerializer, CandidateCardSerializer
+from .pagination import CandidatePagination
+from .serializers import (
+    CARD_VIEWS, DEFAULT_CARD_VIEW, CardSerializer, CardThumbSerializer, KernelSerializer, CandidateCardSerializer
+)
+
+
+def move_card(card_id, kernel_id):
+    """
+    Move one card into a kernel (or back to the candidates when kernel_id is
+    None), raising Http404 for unknown ids like get_object_or_404.
+    
+    Returns:
+        int: 1 if the card's placement changed, else 0
+    """
+    try:
+        return apply_moves([(int(card_id), None if kernel_id is None else int(kernel_id))])
+    except (TypeError, ValueError, Card.DoesNotExist, Kernel.DoesNotExist):
+        raise Http404
+
+
+class CardViewMixin:
+    """Let clients pick how nested cards are serialized with ?view=thumb|full"""
+    
+    def get_card_view(self):
+        view = self.request.query_params.get('view', DEFAULT_CARD_VIEW)
+        if view not in CARD_VIEWS:
+            raise ValidationError({'view': f'Must be one of: {", ".join(CARD_VIEWS)}'})
+        return view
+    
+    def card_fields(self, prefix):
+        """Card columns to load for the selected view (under `prefix`), or None for all of them"""
+        if self.get_card_view() != 'thumb':
+            return None
+        return [f'{prefix}{field}' for field in CardThumbSerializer.QUERY_FIELDS]
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['card_view'] = self.get_card_view()
+        return context
 
 
 class CardViewSet(viewsets.ModelViewSet):
@@ -11,100 +55,187 @@ class CardViewSet(viewsets.ModelViewSet):
     serializer_class = CardSerializer
 
 
-class KernelViewSet(viewsets.ModelViewSet):
+class KernelViewSet(CardViewMixin, viewsets.ModelViewSet):
     queryset = Kernel.objects.all()
     serializer_class = KernelSerializer
     
+    def get_queryset(self):
+        # Kernels in one query, their cards (joined to the card rows) in a second, however many there are
+        kernel_cards = KernelCard.objects.select_related('card').order_by('added_at', 'id')
+        card_fields = self.card_fields('card__')
+        if card_fields:
+            kernel_cards = kernel_cards.only('id', 'kernel_id', 'added_at', *card_fields)
+        # Meta.ordering doesn't apply to the aggregate query, so order it explicitly
+        return Kernel.objects.annotate(card_count=Count('cards')).order_by(
+            *Kernel._meta.ordering
+        ).prefetch_related(Prefetch('cards', queryset=kernel_cards))
+    
+    def perform_create(self, serializer):
+        # New kernels go after the existing ones unless given an order
+        if 'order' not in serializer.validated_data:
+            serializer.save(order=next_kernel_order())
+        else:
+            serializer.save()
+    
     def destroy(self, request, *args, **kwargs):
         """Custom delete method to return cards to candidates before deleting kernel"""
-        kernel = self.get_object()
+        kernel = get_object_or_404(Kernel, pk=kwargs['pk'])
         
-        # Get all cards in this kernel
-        kernel_cards = KernelCard.objects.filter(kernel=kernel)
+        with transaction.atomic():
+            # Return all of the kernel's cards to candidates in one insert
+            card_ids = KernelCard.objects.filter(kernel=kernel).values_list('card_id', flat=True)
+            CandidateCard.objects.bulk_create(
+                [CandidateCard(card_id=card_id) for card_id in card_ids], ignore_conflicts=True
+            )
+            
+            # Delete the kernel (this will cascade delete KernelCard instances)
+            kernel.delete()
         
-        # Return each card to candidates
-        for kernel_card in kernel_cards:
-            CandidateCard.objects.get_or_create(card=kernel_card.card)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=False, methods=['post'])
+    def move_cards(self, request):
+        """
+        Apply a batch of card moves in one request and one transaction.
+        
+        Body: {"moves": [{"card_id": 1, "kernel_id": 2}, {"card_id": 3, "kernel_id": null}, ...]}
+        where a null kernel_id sends the card back to the candidates.
+        """
+        moves = request.data.get('moves')
+        if not isinstance(moves, list) or not moves:
+            return Response({'error': 'moves list is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            pairs = [
+                (int(move['card_id']), None if move.get('kernel_id') is None else int(move['kernel_id']))
+                for move in moves
+            ]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return Response(
+                {'error': 'Each move needs an integer card_id and a kernel_id (null for candidates)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            moved = apply_moves(pairs)
+        except (Card.DoesNotExist, Kernel.DoesNotExist) as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
         
-        # Delete the kernel (this will cascade delete KernelCard instances)
-        return super().destroy(request, *args, **kwargs)
+        return Response({'success': True, 'moved': moved})
     
     @action(detail=True, methods=['post'])
     def add_card(self, request, pk=None):
-        kernel = self.get_object()
         card_id = request.data.get('card_id')
         
         if not card_id:
             return Response({'error': 'card_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        card = get_object_or_404(Card, id=card_id)
-        
-        # Remove from candidates if it exists
-        CandidateCard.objects.filter(card=card).delete()
+        # Removes the card from candidates and any other kernel
+        moved = move_card(card_id, pk)
         
-        # Remove from any other kernel
-        KernelCard.objects.filter(card=card).delete()
-        
-        # Add to this kernel
-        kernel_card, created = KernelCard.objects.get_or_create(
-            kernel=kernel,
-            card=card
-        )
-        
-        return Response({'success': True, 'created': created})
+        return Response({'success': True, 'created': moved > 0})
     
     @action(detail=True, methods=['post'])
     def remove_card(self, request, pk=None):
-        kernel = self.get_object()
         card_id = request.data.get('card_id')
         
         if not card_id:
             return Response({'error': 'card_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
+        kernel = get_object_or_404(Kernel, pk=pk)
         card = get_object_or_404(Card, id=card_id)
         
-        # Remove from kernel
-        KernelCard.objects.filter(kernel=kernel, card=card).delete()
-        
-        # Add back to candidates
-        CandidateCard.objects.get_or_create(card=card)
+        # Remove from this kernel and add back to candidates; a card in another kernel stays put
+        if KernelCard.objects.filter(kernel=kernel, card=card).exists():
+            move_card(card.id, None)
         
         return Response({'success': True})
     
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """
+        Move a kernel to just after another one, rewriting only its own order
+        in the common case. Body: {"after_id": 3}, or {"after_id": null} for first.
+        """
+        after_id = request.data.get('after_id')
+        
+        try:
+            order = move_kernel(int(pk), None if after_id is None else int(after_id))
+        except (TypeError, ValueError):
+            return Response({'error': 'after_id must be a kernel id or null'}, status=status.HTTP_400_BAD_REQUEST)
+        except Kernel.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({'success': True, 'order': order})
+    
     @action(detail=False, methods=['post'])
     def reorder(self, request):
         """Reorder kernels by providing a list of kernel IDs in the desired order"""
         kernel_ids = request.data.get('kernel_ids', [])
         
-        if not kernel_ids:
+        if not kernel_ids or not isinstance(kernel_ids, list):
             return Response({'error': 'kernel_ids list is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update the order field for each kernel
-        for index, kernel_id in enumerate(kernel_ids):
-            try:
-                kernel = Kernel.objects.get(id=kernel_id)
-                kernel.order = index
-                kernel.save()
-            except Kernel.DoesNotExist:
-                return Response({'error': f'Kernel {kernel_id} not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            kernel_ids = [int(kernel_id) for kernel_id in kernel_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'kernel_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(set(kernel_ids)) != len(kernel_ids):
+            return Response({'error': 'kernel_ids must not repeat'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # One query to validate, one bulk_update to write
+        try:
+            reorder_kernels(kernel_ids)
+        except Kernel.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
         
         return Response({'success': True})
 
 
-class CandidateCardViewSet(viewsets.ModelViewSet):
+class CandidateCardViewSet(CardViewMixin, viewsets.ModelViewSet):
     serializer_class = CandidateCardSerializer
+    pagination_class = CandidatePagination
     
     def get_queryset(self):
         # Only show cards that are not already in kernels
         # Sort by number of colors, then color identity, then CMC
-        return CandidateCard.objects.select_related('card').filter(
+        queryset = CandidateCard.objects.select_related('card').filter(
             card__kernelcard__isnull=True
-        ).order_by(
-            'card__num_colors',
-            'card__color_sort_key', 
-            'card__cmc',
-            'card__name'
-        )
+        ).order_by(*CandidatePagination.ordering)
+        queryset = self.filter_candidates(queryset, self.request.query_params)
+        card_fields = self.card_fields('card__')
+        if card_fields:
+            queryset = queryset.only('id', 'card_id', *card_fields, *CandidatePagination.ordering)
+        return queryset
+    
+    def filter_candidates(self, queryset, params):
+        """
+        Apply the optional filters:
+            color_identity: exact color identity as WUBRG letters, or C for colorless
+            cmc / cmc_min / cmc_max: mana value
+            type: text the type line must contain (e.g. creature, legendary)
+        """
+        color_identity = params.get('color_identity', '').upper()
+        if color_identity:
+            colors = set(color_identity) - {'C'}
+            if not colors <= set('WUBRG'):
+                raise ValidationError({'color_identity': 'Use WUBRG letters, or C for colorless'})
+            queryset = queryset.filter(card__num_colors=len(colors))
+            for color in colors:
+                # color_identity is a JSON list, so match the quoted letter
+                queryset = queryset.filter(card__color_identity__icontains=f'"{color}"')
+        
+        for param, lookup in [('cmc', 'card__cmc'), ('cmc_min', 'card__cmc__gte'), ('cmc_max', 'card__cmc__lte')]:
+            if params.get(param):
+                try:
+                    queryset = queryset.filter(**{lookup: float(params[param])})
+                except ValueError:
+                    raise ValidationError({param: 'Must be a number'})
+        
+        if params.get('type'):
+            queryset = queryset.filter(card__type_line__icontains=params['type'])
+        
+        return queryset
     
     @action(detail=False, methods=['post'])
     def move_to_kernel(self, request):
@@ -117,16 +248,7 @@ class CandidateCardViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        card = get_object_or_404(Card, id=card_id)
-        kernel = get_object_or_404(Kernel, id=kernel_id)
-        
-        # Remove from candidates
-        CandidateCard.objects.filter(card=card).delete()
-        
-        # Remove from any other kernel
-        KernelCard.objects.filter(card=card).delete()
-        
-        # Add to specified kernel
-        KernelCard.objects.create(kernel=kernel, card=card)
+        # Removes the card from candidates and any other kernel
+        move_card(card_id, kernel_id)
         
         return Response({'success': True})
\ No newline at end of file
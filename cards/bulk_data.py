@@ -0,0 +1,224 @@
+import json
+import re
+import unicodedata
+
+from django.db.models import Q
+
+from .page_cache import CARDS, STANDINGS, invalidate_pages
+
+# Top-level card fields kept in the local index, in Scryfall's API shape
+CARD_FIELDS = [
+    'id', 'name', 'set', 'collector_number', 'released_at', 'layout', 'image_uris', 'card_faces',
+    'mana_cost', 'cmc', 'type_line', 'oracle_text', 'power', 'toughness', 'colors', 'color_identity',
+    'keywords',
+]
+FACE_FIELDS = ['name', 'image_uris', 'mana_cost', 'type_line', 'oracle_text', 'power', 'toughness', 'colors']
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and collapse whitespace so lookups match how people type card names"""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', name).strip().lower()
+
+
+def project_card(card_data):
+    """Keep only the fields of a Scryfall card object that we store"""
+    projected = {field: card_data[field] for field in CARD_FIELDS if field in card_data}
+    if 'card_faces' in projected:
+        projected['card_faces'] = [
+            {field: face[field] for field in FACE_FIELDS if field in face}
+            for face in projected['card_faces']
+        ]
+    return projected
+
+
+def iter_json_array(chunks):
+    """
+    Incrementally parse a top-level JSON array, yielding one element at a time.
+
+    Args:
+        chunks: iterable of text chunks (e.g. a streamed HTTP response)
+
+    Only the element currently being decoded is buffered, so peak memory
+    depends on the size of a single card rather than the whole file, and no
+    particular line layout is assumed.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    exhausted = False
+    chunks = iter(chunks)
+
+    while True:
+        # Skip whitespace, the opening bracket and separators between elements
+        while position < len(buffer) and (buffer[position].isspace() or buffer[position] in ',['):
+            if buffer[position] == '[':
+                if started:
+                    break
+                started = True
+            position += 1
+
+        if position < len(buffer) and buffer[position] == ']' and started:
+            return
+
+        if position < len(buffer):
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+            else:
+                # A number only ends at a delimiter; at the end of the buffer, or before
+                # a '.', 'e' or digit cut off mid-number, it may continue in the next chunk
+                complete = end < len(buffer) and (buffer[end].isspace() or buffer[end] in ',]')
+                if complete or exhausted or not isinstance(element, (int, float)):
+                    yield element
+                    buffer = buffer[end:]
+                    position = 0
+                    continue
+
+        if exhausted:
+            # Only the closing bracket ends the array; anything else is a truncated file
+            raise ValueError('Unexpected end of JSON array')
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+        else:
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def iter_file_chunks(fp, chunk_size=1 << 16):
+    """Read a text file in fixed-size chunks"""
+    return iter(lambda: fp.read(chunk_size), '')
+
+
+def iter_bulk_file(source):
+    """
+    Yield card objects from a Scryfall bulk-data file one at a time.
+
+    Args:
+        source: an open text file, or an iterable of text chunks
+    """
+    chunks = iter_file_chunks(source) if hasattr(source, 'read') else source
+    return iter_json_array(chunks)
+
+
+def index_entry(card_data):
+    """Build an unsaved ScryfallCard for a Scryfall card object"""
+    from .models import ScryfallCard
+
+    data = project_card(card_data)
+    name = data.get('name', '')
+    front_face = name.split(' // ')[0] if ' // ' in name else ''
+    return ScryfallCard(
+        scryfall_id=data['id'],
+        name=name,
+        normalized_name=normalize_name(name),
+        front_face_name=normalize_name(front_face),
+        set_code=data.get('set', '').lower(),
+        collector_number=str(data.get('collector_number', '')).lower(),
+        released_at=data.get('released_at') or None,
+        data=data,
+    )
+
+
+def upsert_index(entries):
+    """Insert or refresh a chunk of ScryfallCard rows in one statement"""
+    from .models import ScryfallCard
+
+    ScryfallCard.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=['scryfall_id'],
+        update_fields=['name', 'normalized_name', 'front_face_name', 'set_code', 'collector_number',
+                       'released_at', 'data'],
+    )
+
+
+def sync_cards(cards_data):
+    """
+    Refresh the Scryfall fields of cards already in the cube from a chunk of card objects.
+
+    Cards are matched on scryfall_id with one existence query, projected to
+    the columns Card stores (derived sort keys included) and written with a
+    single bulk_create(update_conflicts=True). Cards not in the cube are ignored.
+
+    Returns:
+        int: number of cards refreshed
+    """
+    from .models import Card
+
+    by_id = {card_data['id']: card_data for card_data in cards_data}
+    existing = set(Card.objects.filter(scryfall_id__in=by_id).values_list('scryfall_id', flat=True))
+    if not existing:
+        return 0
+
+    cards = [Card.from_scryfall(by_id[scryfall_id]) for scryfall_id in existing]
+    Card.objects.bulk_create(
+        cards,
+        update_conflicts=True,
+        unique_fields=['scryfall_id'],
+        update_fields=Card.SCRYFALL_FIELDS + ['num_colors', 'color_sort_key', 'display'],
+    )
+    invalidate_pages(CARDS, STANDINGS)
+    return len(cards)
+
+
+def lookup_local(identifiers):
+    """
+    Resolve collection-style identifiers against the local index.
+
+    Uses one query per identifier kind. Name lookups prefer the most recently
+    released printing.
+
+    Returns:
+        list: card data (or None) for each identifier, in the same order
+    """
+    from .models import ScryfallCard
+
+    ids = [identifier['id'] for identifier in identifiers if 'id' in identifier]
+    names = [normalize_name(identifier['name']) for identifier in identifiers if 'name' in identifier]
+    printings = [
+        (identifier['set'].lower(), str(identifier['collector_number']).lower())
+        for identifier in identifiers if 'set' in identifier
+    ]
+
+    by_id = {}
+    if ids:
+        by_id = dict(ScryfallCard.objects.filter(scryfall_id__in=ids).values_list('scryfall_id', 'data'))
+
+    by_name = {}
+    if names:
+        rows = (
+            ScryfallCard.objects.filter(Q(normalized_name__in=names) | Q(front_face_name__in=names))
+            .order_by('released_at')
+            .values_list('normalized_name', 'front_face_name', 'data')
+        )
+        # Later (newer) printings overwrite earlier ones
+        for normalized_name, front_face_name, data in rows:
+            by_name[normalized_name] = data
+            if front_face_name:
+                by_name[('face', front_face_name)] = data
+
+    by_printing = {}
+    if printings:
+        query = Q()
+        for set_code, collector_number in printings:
+            query |= Q(set_code=set_code, collector_number=collector_number)
+        rows = ScryfallCard.objects.filter(query).values_list('set_code', 'collector_number', 'data')
+        by_printing = {(set_code, number): data for set_code, number, data in rows}
+
+    results = []
+    for identifier in identifiers:
+        if 'id' in identifier:
+            results.append(by_id.get(identifier['id']))
+        elif 'set' in identifier:
+            results.append(by_printing.get((identifier['set'].lower(), str(identifier['collector_number']).lower())))
+        else:
+            name = normalize_name(identifier['name'])
+            results.append(by_name.get(name) or by_name.get(('face', name)))
+    return results
@@ -0,0 +1,157 @@
+import numpy as np
+
+from .glicko2 import Glicko2
+
+
+class VectorizedGlicko2:
+    """
+    NumPy implementation of a Glicko-2 rating period over a whole pool of players.
+
+    Players are addressed by index into flat mu/phi/sigma arrays (Glicko-2 scale).
+    The matches of a period form a sparse match matrix given in coordinate form:
+    one (player, opponent, outcome) entry per player per game. The scalar
+    Glicko2 class remains the reference implementation; this one must agree
+    with it to within the volatility solver's tolerance.
+    """
+
+    TAU = Glicko2.TAU
+    EPSILON = 0.000001
+    MAX_ITERATIONS = 100
+
+    @staticmethod
+    def g(phi):
+        """g(φ) function from Glicko-2"""
+        return 1 / np.sqrt(1 + 3 * phi**2 / np.pi**2)
+
+    @staticmethod
+    def E(mu, mu_j, phi_j):
+        """Expected outcome function E(μ, μⱼ, φⱼ)"""
+        return 1 / (1 + np.exp(-VectorizedGlicko2.g(phi_j) * (mu - mu_j)))
+
+    @staticmethod
+    def match_matrix(winners, losers):
+        """Expand winner/loser index arrays into (players, opponents, outcomes) entries"""
+        winners = np.asarray(winners, dtype=np.intp)
+        losers = np.asarray(losers, dtype=np.intp)
+        players = np.concatenate([winners, losers])
+        opponents = np.concatenate([losers, winners])
+        outcomes = np.concatenate([np.ones(len(winners)), np.zeros(len(losers))])
+        return players, opponents, outcomes
+
+    @staticmethod
+    def update_period(mu, phi, sigma, players, opponents, outcomes, max_inactive_phi=None):
+        """
+        Update every player for one rating period.
+
+        Args:
+            mu, phi, sigma: arrays of current ratings (Glicko-2 scale)
+            players, opponents, outcomes: sparse match matrix in coordinate form
+            max_inactive_phi: optional cap on the RD growth of players with no games
+
+        Returns:
+            tuple: (new_mu, new_phi, new_sigma) arrays
+        """
+        mu = np.asarray(mu, dtype=float)
+        phi = np.asarray(phi, dtype=float)
+        sigma = np.asarray(sigma, dtype=float)
+        n = len(mu)
+
+        # Steps 3 and 4: v and delta, summed per player over their games
+        g_opp = VectorizedGlicko2.g(phi[opponents])
+        expected = 1 / (1 + np.exp(-g_opp * (mu[players] - mu[opponents])))
+        v_inv = np.bincount(players, weights=g_opp**2 * expected * (1 - expected), minlength=n)
+        score = np.bincount(players, weights=g_opp * (outcomes - expected), minlength=n)
+
+        active = v_inv > 0
+        new_mu = mu.copy()
+        new_sigma = sigma.copy()
+        new_phi = np.sqrt(phi**2 + sigma**2)
+        if max_inactive_phi is not None:
+            new_phi = np.where(active, new_phi, np.minimum(new_phi, max_inactive_phi))
+
+        if active.any():
+            v = 1 / v_inv[active]
+            delta = v * score[active]
+
+            # Step 5: new volatility
+            sigma_active = VectorizedGlicko2._compute_new_volatility(phi[active], sigma[active], delta, v)
+
+            # Steps 6 and 7: new phi and mu
+            phi_star = np.sqrt(phi[active]**2 + sigma_active**2)
+            phi_active = 1 / np.sqrt(1 / phi_star**2 + 1 / v)
+
+            new_sigma[active] = sigma_active
+            new_phi[active] = phi_active
+            new_mu[active] = mu[active] + phi_active**2 * score[active]
+
+        return new_mu, new_phi, new_sigma
+
+    @staticmethod
+    def _compute_new_volatility(phi, sigma, delta, v):
+        """Compute new volatilities using the Illinois algorithm, converging all players simultaneously"""
+        tau = VectorizedGlicko2.TAU
+        phi2 = phi**2
+        delta2 = delta**2
+        tau2 = tau**2
+        a = np.log(sigma**2)
+
+        def f(x, idx=slice(None)):
+            ex = np.exp(x)
+            return (ex * (delta2[idx] - phi2[idx] - v[idx] - ex) / (2 * (phi2[idx] + v[idx] + ex)**2) -
+                    (x - a[idx]) / tau2)
+
+        # Initial bounds
+        A = a.copy()
+        big_delta = delta2 > phi2 + v
+        B = np.where(big_delta, np.log(np.where(big_delta, delta2 - phi2 - v, 1.0)), A - tau)
+        pending = ~big_delta
+        k = np.ones(len(A))
+        while pending.any():
+            idx = np.flatnonzero(pending)
+            still_negative = f(A[idx] - k[idx] * tau, idx) < 0
+            k[idx[still_negative]] += 1
+            pending[idx[~still_negative]] = False
+        B = np.where(big_delta, B, A - k * tau)
+
+        # Illinois algorithm, iterating only players that have not yet converged
+        fa = f(A)
+        fb = f(B)
+        for _ in range(VectorizedGlicko2.MAX_ITERATIONS):
+            idx = np.flatnonzero(np.abs(B - A) > VectorizedGlicko2.EPSILON)
+            if not len(idx):
+                break
+            C = A[idx] + (A[idx] - B[idx]) * fa[idx] / (fb[idx] - fa[idx])
+            fc = f(C, idx)
+
+            swap = fc * fb[idx] <= 0
+            A[idx[swap]] = B[idx[swap]]
+            fa[idx[swap]] = fb[idx[swap]]
+            fa[idx[~swap]] /= 2
+
+            B[idx] = C
+            fb[idx] = fc
+
+        return np.exp(A / 2)
+
+    @staticmethod
+    def rate_period(ratings, rds, volatilities, winners, losers, max_inactive_rd=None):
+        """
+        Rate one period on the display scale.
+
+        Args:
+            ratings, rds, volatilities: arrays of current values, one entry per player
+            winners, losers: index arrays, one entry per game
+            max_inactive_rd: optional cap on the RD growth of players with no games
+
+        Returns:
+            tuple: (new_ratings, new_rds, new_volatilities) arrays
+        """
+        mu = (np.asarray(ratings, dtype=float) - 1500) / 173.7178
+        phi = np.asarray(rds, dtype=float) / 173.7178
+        players, opponents, outcomes = VectorizedGlicko2.match_matrix(winners, losers)
+        max_inactive_phi = None if max_inactive_rd is None else max_inactive_rd / 173.7178
+
+        new_mu, new_phi, new_sigma = VectorizedGlicko2.update_period(
+            mu, phi, volatilities, players, opponents, outcomes, max_inactive_phi
+        )
+        return 173.7178 * new_mu + 1500, 173.7178 * new_phi, new_sigma
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def cache_key(method, url, params=None, payload=None):
+    """Stable key for a request: method, URL, query parameters and JSON body"""
+    parts = [method.upper(), url, json.dumps(params or {}, sort_keys=True), json.dumps(payload, sort_keys=True)]
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+class CachedResponse:
+    """A stored response body with the validators needed to revalidate it"""
+
+    def __init__(self, status, body, etag, last_modified, stored_at):
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def json(self):
+        return json.loads(self.body)
+
+    def is_fresh(self, ttl):
+        return time.time() - self.stored_at < ttl
+
+    def conditional_headers(self):
+        """If-None-Match / If-Modified-Since headers for revalidating a stale entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache backed by a single SQLite file.
+
+    Entries are fresh for `ttl` seconds; after that the caller revalidates
+    with the stored ETag/Last-Modified and calls `refresh` on a 304. Once
+    more than `max_entries` are stored the least recently used are evicted.
+    The file is safe to share between threads and between processes on the
+    same machine. Any SQLite error is treated as a miss, so a broken cache
+    never breaks a lookup.
+    """
+
+    PRUNE_EVERY = 100  # writes between size checks
+
+    def __init__(self, path, ttl=86400, max_entries=20000):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = None
+        self.writes = 0
+
+    def _connect(self):
+        if self.connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' key TEXT PRIMARY KEY, status INTEGER, body TEXT, etag TEXT, last_modified TEXT,'
+                ' stored_at REAL, accessed_at REAL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_idx ON responses (accessed_at)')
+            self.connection = connection
+        return self.connection
+
+    def get(self, key):
+        """Return the stored response for a key (fresh or not), or None"""
+        with self.lock:
+            try:
+                connection = self._connect()
+                row = connection.execute(
+                    'SELECT status, body, etag, last_modified, stored_at FROM responses WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            except sqlite3.Error:
+                return None
+        return CachedResponse(*row)
+
+    def set(self, key, status, body, etag=None, last_modified=None):
+        """Store a response body, replacing any previous entry"""
+        now = time.time()
+        with self.lock:
+            try:
+                connection = self._connect()
+                connection.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, status, body, etag, last_modified, now, now),
+                )
+                self.writes += 1
+                if self.writes % self.PRUNE_EVERY == 0:
+                    self._prune(connection)
+            except sqlite3.Error:
+                pass
+
+    def refresh(self, key):
+        """Mark an entry as fresh again after the server confirmed it is unchanged (304)"""
+        now = time.time()
+        with self.lock:
+            try:
+                self._connect().execute(
+                    'UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, key)
+                )
+            except sqlite3.Error:
+                pass
+
+    def _prune(self, connection):
+        connection.execute(
+            'DELETE FROM responses WHERE key IN ('
+            ' SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self.lock:
+            try:
+                self._connect().execute('DELETE FROM responses')
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .importer import import_card_list
+
+# Lines resolved and written per progress update
+IMPORT_CHUNK_SIZE = 100
+
+# A running job that has not reported progress for this long is assumed to
+# belong to a worker that died, and is picked up again where it stopped
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue_import(lines):
+    """Record a card list for the import worker and return the new ImportJob"""
+    from .models import ImportJob
+
+    return ImportJob.objects.create(lines=lines, total=len(lines))
+
+
+def claim_next_job():
+    """
+    Claim the oldest pending (or abandoned) import job, or return None.
+
+    The row is locked with SELECT ... FOR UPDATE SKIP LOCKED where the database
+    supports it, so several workers never claim the same job.
+    """
+    from .models import ImportJob
+
+    stale = timezone.now() - STALE_AFTER
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=ImportJob.PENDING) | Q(status=ImportJob.RUNNING, updated_at__lt=stale))
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImportJob.RUNNING
+        job.started_at = job.started_at or timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+    return job
+
+
+def run_import_job(job, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Work through a job's lines in chunks, publishing counts after each one.
+
+    Each chunk goes through import_card_list, so lines repeated across chunks
+    are counted as already existing just as they would be in a single import.
+    """
+    from .models import ImportJob
+
+    try:
+        for start in range(job.processed, job.total, chunk_size):
+            chunk = job.lines[start:start + chunk_size]
+            results = import_card_list(chunk)
+            ImportJob.objects.filter(id=job.id).update(
+                processed=start + len(chunk),
+                added=F('added') + results['added'],
+                existed=F('existed') + results['existed'],
+                errors=F('errors') + results['errors'],
+                updated_at=timezone.now(),
+            )
+            if results['error_details']:
+                # JSON columns can't be appended to portably, so rewrite the list
+                job.error_details = job.error_details + results['error_details']
+                job.save(update_fields=['error_details'])
+        status, failure = ImportJob.DONE, ''
+    except Exception as e:
+        status, failure = ImportJob.FAILED, str(e)
+
+    ImportJob.objects.filter(id=job.id).update(
+        status=status, failure=failure, finished_at=timezone.now(), updated_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    return job
+
+
+def run_pending_jobs(chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Run import jobs until none are waiting.
+
+    Returns:
+        int: number of jobs run
+    """
+    count = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            return count
+        run_import_job(job, chunk_size)
+        count += 1
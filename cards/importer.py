@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .page_cache import CARDS, STANDINGS, invalidate_pages
+from .scryfall import get_client
+from .search import get_search_index
+
+
+def import_card_list(lines):
+    """
+    Add the cards named by lines of user input (card names or Scryfall URLs).
+
+    The whole list is resolved first, then a single query finds which cards
+    already exist (by Scryfall id or name) and all new cards are inserted with
+    one bulk_create inside a transaction, so a long paste costs a handful of
+    queries rather than two per line.
+
+    Returns:
+        dict: total/added/existed/errors counts and error_details
+    """
+    from .models import Card
+
+    results = {
+        'total': len(lines),
+        'added': 0,
+        'existed': 0,
+        'errors': 0,
+        'error_details': []
+    }
+
+    resolved = get_client().resolve_lines(lines)
+
+    found = []
+    for line, card_data in zip(lines, resolved):
+        if card_data:
+            found.append(card_data)
+        else:
+            results['errors'] += 1
+            results['error_details'].append(f"Card not found: {line}")
+
+    existing = Card.objects.filter(
+        Q(scryfall_id__in={card_data['id'] for card_data in found}) |
+        Q(name__in={card_data['name'] for card_data in found})
+    ).values_list('scryfall_id', 'name')
+    seen_ids = set()
+    seen_names = set()
+    for scryfall_id, name in existing:
+        seen_ids.add(scryfall_id)
+        seen_names.add(name)
+
+    new_cards = []
+    for card_data in found:
+        # Repeats within the list count as already existing too
+        if card_data['id'] in seen_ids or card_data['name'] in seen_names:
+            results['existed'] += 1
+            continue
+        seen_ids.add(card_data['id'])
+        seen_names.add(card_data['name'])
+        # from_scryfall fills num_colors/color_sort_key, which bulk_create would skip
+        new_cards.append(Card.from_scryfall(card_data))
+
+    if new_cards:
+        with transaction.atomic():
+            Card.objects.bulk_create(new_cards, ignore_conflicts=True)
+            added = list(
+                Card.objects.filter(scryfall_id__in=[card.scryfall_id for card in new_cards])
+                .only('id', 'name', 'rating', 'rating_deviation')
+            )
+        # bulk_create bypasses save(), so register the new cards for voting and search explicitly
+        for card in added:
+            card._rating_changed()
+            get_search_index().update(card.id, card.name)
+        invalidate_pages(CARDS, STANDINGS)
+        results['added'] = len(added)
+        results['existed'] += len(new_cards) - len(added)
+
+    return results
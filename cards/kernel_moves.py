@@ -0,0 +1,69 @@
+from django.db import transaction
+
+
+def apply_moves(moves):
+    """
+    Move cards between kernels and the candidate pool in one transaction.
+
+    Args:
+        moves: iterable of (card_id, kernel_id) pairs; a kernel_id of None
+            sends the card back to the candidates. If a card appears more
+            than once, its last move wins.
+
+    Unknown card or kernel ids raise Card.DoesNotExist / Kernel.DoesNotExist
+    before anything is written. Cards already where they are being moved
+    keep their existing rows (and so their place within the kernel). The
+    whole batch costs a fixed handful of queries however many cards move.
+
+    Returns:
+        int: number of cards whose placement changed
+    """
+    from .models import Card, Kernel, KernelCard, CandidateCard
+
+    targets = dict(moves)
+    if not targets:
+        return 0
+
+    card_ids = set(targets)
+    kernel_ids = {kernel_id for kernel_id in targets.values() if kernel_id is not None}
+
+    with transaction.atomic():
+        missing_cards = card_ids - set(Card.objects.filter(id__in=card_ids).values_list('id', flat=True))
+        if missing_cards:
+            raise Card.DoesNotExist(f'Cards not found: {sorted(missing_cards)}')
+        missing_kernels = kernel_ids - set(Kernel.objects.filter(id__in=kernel_ids).values_list('id', flat=True))
+        if missing_kernels:
+            raise Kernel.DoesNotExist(f'Kernels not found: {sorted(missing_kernels)}')
+
+        # Where each moving card is now: its kernel, or None if it isn't in one
+        current = dict(KernelCard.objects.filter(card_id__in=card_ids).values_list('card_id', 'kernel_id'))
+        candidates = set(CandidateCard.objects.filter(card_id__in=card_ids).values_list('card_id', flat=True))
+
+        leaving_kernels = [card_id for card_id, kernel_id in current.items() if targets[card_id] != kernel_id]
+        joining_kernels = [
+            KernelCard(kernel_id=kernel_id, card_id=card_id)
+            for card_id, kernel_id in targets.items()
+            if kernel_id is not None and current.get(card_id) != kernel_id
+        ]
+        leaving_candidates = [
+            card_id for card_id, kernel_id in targets.items() if kernel_id is not None and card_id in candidates
+        ]
+        joining_candidates = [
+            CandidateCard(card_id=card_id)
+            for card_id, kernel_id in targets.items()
+            if kernel_id is None and card_id not in candidates
+        ]
+
+        if leaving_kernels:
+            KernelCard.objects.filter(card_id__in=leaving_kernels).delete()
+        if leaving_candidates:
+            CandidateCard.objects.filter(card_id__in=leaving_candidates).delete()
+        if joining_kernels:
+            KernelCard.objects.bulk_create(joining_kernels)
+        if joining_candidates:
+            CandidateCard.objects.bulk_create(joining_candidates, ignore_conflicts=True)
+
+    changed = {card_id for card_id in targets if targets[card_id] != current.get(card_id)}
+    # A card with no kernel and no candidate row is (re)placed even when moved "to candidates"
+    changed |= {candidate.card_id for candidate in joining_candidates}
+    return len(changed)
@@ -0,0 +1,93 @@
+from django.db import transaction
+
+# Kernels are spaced ORDER_STEP apart, so moving one kernel between two others
+# only rewrites that kernel's row until the gap between them is used up
+ORDER_STEP = 1024
+
+
+def spaced_orders(count):
+    """Evenly spaced order values for `count` kernels"""
+    return [(position + 1) * ORDER_STEP for position in range(count)]
+
+
+def next_kernel_order():
+    """Order value that places a new kernel after all existing ones"""
+    from .models import Kernel
+
+    last = Kernel.objects.order_by('-order').values_list('order', flat=True).first()
+    return (last or 0) + ORDER_STEP
+
+
+def _renumber(kernels):
+    """Respace `kernels` (in their new order) with one bulk_update, writing only changed rows"""
+    from .models import Kernel
+
+    changed = []
+    for kernel, order in zip(kernels, spaced_orders(len(kernels))):
+        if kernel.order != order:
+            kernel.order = order
+            changed.append(kernel)
+    if changed:
+        Kernel.objects.bulk_update(changed, ['order'])
+    return changed
+
+
+def reorder_kernels(kernel_ids):
+    """
+    Put the given kernels in this order, in one transaction.
+
+    All ids are checked with one query and the new orders are written with one
+    bulk_update, whatever the number of kernels. Unknown ids raise
+    Kernel.DoesNotExist before anything is written.
+
+    Returns:
+        int: number of kernels whose order changed
+    """
+    from .models import Kernel
+
+    with transaction.atomic():
+        kernels = Kernel.objects.select_for_update().only('id', 'order').in_bulk(kernel_ids)
+        missing = [kernel_id for kernel_id in kernel_ids if kernel_id not in kernels]
+        if missing:
+            raise Kernel.DoesNotExist(f'Kernels not found: {missing}')
+        return len(_renumber([kernels[kernel_id] for kernel_id in kernel_ids]))
+
+
+def move_kernel(kernel_id, after_id=None):
+    """
+    Move one kernel to just after another (or to the front if after_id is None).
+
+    The kernel takes the midpoint of its new neighbours' orders, so normally
+    only its own row is written. When there is no gap left (or legacy rows
+    share an order) every kernel is respaced with a single bulk_update.
+    Either way the move costs a fixed number of queries.
+
+    Returns:
+        int: the kernel's new order
+    """
+    from .models import Kernel
+
+    with transaction.atomic():
+        kernels = list(Kernel.objects.select_for_update().only('id', 'order', 'created_at'))
+        by_id = {kernel.id: kernel for kernel in kernels}
+        if kernel_id not in by_id:
+            raise Kernel.DoesNotExist(f'Kernel {kernel_id} not found')
+        if after_id is not None and (after_id not in by_id or after_id == kernel_id):
+            raise Kernel.DoesNotExist(f'Kernel {after_id} not found')
+
+        moving = by_id[kernel_id]
+        kernels.remove(moving)
+        position = 0 if after_id is None else kernels.index(by_id[after_id]) + 1
+        kernels.insert(position, moving)
+
+        lower = kernels[position - 1].order if position > 0 else 0
+        upper = kernels[position + 1].order if position + 1 < len(kernels) else lower + 2 * ORDER_STEP
+        if lower < moving.order < upper:
+            return moving.order
+        if upper - lower > 1:
+            order = (lower + upper) // 2
+            Kernel.objects.filter(id=kernel_id).update(order=order)
+            return order
+
+        _renumber(kernels)
+        return moving.order
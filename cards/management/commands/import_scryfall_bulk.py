@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from cards.bulk_data import index_entry, iter_bulk_file, project_card, sync_cards, upsert_index
+from cards.models import ScryfallCard
+from cards.scryfall import get_client
+
+
+class Command(BaseCommand):
+    help = 'Load a Scryfall bulk-data file into the local card index used for offline lookups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            help='Path to a Scryfall bulk-data JSON file (e.g. oracle-cards-*.json)',
+        )
+        parser.add_argument(
+            '--download',
+            metavar='TYPE',
+            help='Stream the latest bulk file of this type from Scryfall instead (e.g. oracle_cards, default_cards)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of cards per upsert statement (default: 1000)',
+        )
+        parser.add_argument(
+            '--sync-cards',
+            action='store_true',
+            help='Also refresh the Scryfall fields of cards already in the cube from the file',
+        )
+
+    def handle(self, *args, **options):
+        if bool(options['path']) == bool(options['download']):
+            raise CommandError('Give either a file path or --download TYPE')
+
+        if options['download']:
+            client = get_client()
+            bulk_info = client.get_json(f'/bulk-data/{options["download"]}')
+            if not bulk_info:
+                raise CommandError(f'Unknown bulk data type: {options["download"]}')
+            self.stdout.write(f'Streaming {bulk_info["download_uri"]}')
+            response = client.session.get(bulk_info['download_uri'], stream=True, timeout=60)
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            self.load(response.iter_content(chunk_size=1 << 16, decode_unicode=True), options)
+        else:
+            with open(options['path'], encoding='utf-8') as fp:
+                self.load(fp, options)
+
+    def load(self, source, options):
+        # The file is parsed incrementally and only one batch of projected cards is held at a time,
+        # so memory stays flat however large the file is
+        total = 0
+        synced = 0
+        batch = []
+        for card_data in iter_bulk_file(source):
+            # Art series and tokens share names with real cards; keep them out of name lookups
+            if card_data.get('layout') in ('art_series', 'token', 'double_faced_token', 'emblem'):
+                continue
+            batch.append(project_card(card_data))
+            if len(batch) >= options['batch_size']:
+                synced += self.flush(batch, options['sync_cards'])
+                total += len(batch)
+                batch = []
+        if batch:
+            synced += self.flush(batch, options['sync_cards'])
+            total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {total} cards ({ScryfallCard.objects.count()} in the local index)'
+        ))
+        if options['sync_cards']:
+            self.stdout.write(self.style.SUCCESS(f'Refreshed {synced} cube cards'))
+
+    def flush(self, batch, sync):
+        with transaction.atomic():
+            upsert_index([index_entry(card_data) for card_data in batch])
+            synced = sync_cards(batch) if sync else 0
+        self.stdout.write(f'  upserted {len(batch)} cards')
+        return synced
@@ -1,10 +1,18 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from cards.models import Card
+from cards.models import BackfillCheckpoint, Card
+from cards.scryfall import COLLECTION_BATCH_SIZE, get_client
 import requests
-import time
-import json
-import os
+
+CHECKPOINT_NAME = 'populate_mtg_data'
+
+# Card fields filled in by this command, written together with the derived sort keys
+MTG_FIELDS = [
+    'mana_cost', 'cmc', 'type_line', 'oracle_text', 'power', 'toughness', 'colors', 'color_identity', 'keywords',
+]
 
 
 class Command(BaseCommand):
@@ -25,147 +33,138 @@ class Command(BaseCommand):
         parser.add_argument(
             '--batch-size',
             type=int,
-            default=100,
-            help='Number of cards to process before committing to database',
+            default=500,
+            help='Number of cards written per bulk update and checkpoint (default: 500)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Concurrent Scryfall collection requests (default: 4)',
         )
         parser.add_argument(
-            '--start-from',
+            '--after-id',
             type=int,
-            default=0,
-            help='Skip the first N cards (for resuming interrupted runs)',
+            default=None,
+            help='Start after this card id instead of at the saved checkpoint',
         )
         parser.add_argument(
-            '--rate-limit',
-            type=float,
-            default=0.1,
-            help='Seconds to wait between API requests (default: 0.1)',
+            '--restart',
+            action='store_true',
+            help='Ignore the saved checkpoint and start from the first card',
         )
 
     def handle(self, *args, **options):
-        # Get cards that need MTG data (those missing type_line)
-        base_queryset = Card.objects.filter(
-            type_line__in=['', None]
-        ).exclude(scryfall_id='').order_by('id')
-        
-        # Apply start_from offset
-        if options['start_from'] > 0:
-            base_queryset = base_queryset[options['start_from']:]
-            self.stdout.write(f'Starting from card #{options["start_from"]}')
-        
-        # Apply limit
-        if options['limit']:
-            cards_to_update = base_queryset[:options['limit']]
+        dry_run = options['dry_run']
+        checkpoint = (BackfillCheckpoint.objects.filter(name=CHECKPOINT_NAME).first() or
+                      BackfillCheckpoint(name=CHECKPOINT_NAME))
+
+        if options['after_id'] is not None:
+            after_id = options['after_id']
+        elif options['restart']:
+            after_id = 0
         else:
-            cards_to_update = base_queryset
-        
+            after_id = checkpoint.last_id
+        if after_id:
+            self.stdout.write(f'Resuming after card id {after_id}')
+
+        # Get cards that need MTG data (those missing type_line), walking by id so
+        # the position stays valid as rows get filled in
+        queryset = Card.objects.filter(
+            type_line__in=['', None], id__gt=after_id
+        ).exclude(scryfall_id='').order_by('id').only('id', 'name', 'scryfall_id')
+        if options['limit']:
+            queryset = queryset[:options['limit']]
+        cards_to_update = list(queryset)
+
         total_cards = len(cards_to_update)
         self.stdout.write(f'Found {total_cards} cards that need MTG data')
-        
-        if options['dry_run']:
+
+        if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN - No changes will be made'))
-        
+
+        chunks = [
+            cards_to_update[start:start + COLLECTION_BATCH_SIZE]
+            for start in range(0, total_cards, COLLECTION_BATCH_SIZE)
+        ]
+
         updated_count = 0
         error_count = 0
-        batch_count = 0
-        cards_in_batch = []
-        
-        # Detect if running on Heroku
-        is_heroku = 'DYNO' in os.environ
-        if is_heroku:
-            self.stdout.write('Detected Heroku environment - using batch processing')
-        
-        for i, card in enumerate(cards_to_update, 1):
-            # Less verbose output for large runs
-            if total_cards > 50 and i % 10 == 0:
-                self.stdout.write(f'Processing batch {i//10}: cards {i-9}-{min(i, total_cards)}')
-            elif total_cards <= 50:
-                self.stdout.write(f'Processing {i}/{total_cards}: {card.name}')
-            
-            try:
-                # Fetch card data from Scryfall
-                response = requests.get(
-                    f'https://api.scryfall.com/cards/{card.scryfall_id}',
-                    timeout=15,
-                    headers={'User-Agent': 'MTG-Cube-App/1.0'}
-                )
-                
-                if response.status_code == 200:
-                    card_data = response.json()
-                    
-                    if not options['dry_run']:
-                        # Update MTG-specific fields
-                        card.mana_cost = card_data.get('mana_cost', '')
-                        card.cmc = card_data.get('cmc', 0)
-                        card.type_line = card_data.get('type_line', '')
-                        card.oracle_text = card_data.get('oracle_text', '')
-                        card.power = card_data.get('power')
-                        card.toughness = card_data.get('toughness')
-                        card.colors = card_data.get('colors', [])
-                        card.color_identity = card_data.get('color_identity', [])
-                        card.keywords = card_data.get('keywords', [])
-                        
-                        # Add to batch for processing
-                        cards_in_batch.append(card)
-                    
+        saved_count = 0
+        pending = []
+        last_id = after_id
+
+        def write_batch():
+            nonlocal pending, saved_count
+            if not dry_run:
+                with transaction.atomic():
+                    if pending:
+                        Card.objects.bulk_update(pending, MTG_FIELDS + ['num_colors', 'color_sort_key'])
+                    checkpoint.last_id = last_id
+                    checkpoint.save()
+            saved_count += len(pending)
+            if pending:
+                self.stdout.write(f'Saved batch of {len(pending)} cards (total saved: {saved_count})')
+            pending = []
+
+        client = get_client()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            # Fetch a few chunks ahead while this thread, the only writer, applies them in id order
+            in_flight = deque()
+            next_chunk = 0
+            for processed in range(len(chunks)):
+                while next_chunk < len(chunks) and len(in_flight) < options['workers'] * 2:
+                    chunk = chunks[next_chunk]
+                    in_flight.append(executor.submit(client.cards_by_ids, [card.scryfall_id for card in chunk]))
+                    next_chunk += 1
+
+                chunk = chunks[processed]
+                try:
+                    found = in_flight.popleft().result()
+                except requests.RequestException as e:
+                    for future in in_flight:
+                        future.cancel()
+                    # Keep everything up to the failed chunk so a rerun retries exactly from there
+                    write_batch()
+                    raise CommandError(
+                        f'Network error fetching cards {chunk[0].id}-{chunk[-1].id}: {e}. '
+                        f'Run the command again to resume after card id {last_id}.'
+                    )
+
+                for card in chunk:
+                    card_data = found.get(card.scryfall_id)
+                    if not card_data:
+                        error_count += 1
+                        self.stdout.write(self.style.ERROR(f'  ✗ Card not found on Scryfall: {card.name}'))
+                        continue
+
+                    fresh = Card.from_scryfall(card_data)
+                    for field in MTG_FIELDS + ['num_colors', 'color_sort_key']:
+                        setattr(card, field, getattr(fresh, field))
+                    pending.append(card)
                     updated_count += 1
-                    
+
                     if total_cards <= 50:
                         self.stdout.write(
-                            self.style.SUCCESS(f'  ✓ {card_data.get("type_line", "Unknown")} (CMC: {card_data.get("cmc", 0)})')
+                            self.style.SUCCESS(f'  ✓ {card.name}: {card.type_line or "Unknown"} (CMC: {card.cmc})')
                         )
-                
-                elif response.status_code == 404:
-                    error_count += 1
-                    self.stdout.write(
-                        self.style.ERROR(f'  ✗ Card not found on Scryfall: {card.name}')
-                    )
-                else:
-                    error_count += 1
-                    self.stdout.write(
-                        self.style.ERROR(f'  ✗ API error {response.status_code} for {card.name}')
-                    )
-                
-                # Process batch when it reaches batch_size
-                if len(cards_in_batch) >= options['batch_size'] and not options['dry_run']:
-                    with transaction.atomic():
-                        for batch_card in cards_in_batch:
-                            batch_card.save()  # This will calculate num_colors and color_sort_key
-                    batch_count += len(cards_in_batch)
-                    self.stdout.write(f'Saved batch of {len(cards_in_batch)} cards (total saved: {batch_count})')
-                    cards_in_batch = []
-                
-                # Rate limiting - be more conservative for Heroku
-                rate_limit = options['rate_limit']
-                if is_heroku:
-                    rate_limit = max(rate_limit, 0.15)  # Minimum 150ms on Heroku
-                time.sleep(rate_limit)
-                
-            except requests.RequestException as e:
-                error_count += 1
-                self.stdout.write(
-                    self.style.ERROR(f'  ✗ Network error for {card.name}: {str(e)}')
-                )
-            except Exception as e:
-                error_count += 1
-                self.stdout.write(
-                    self.style.ERROR(f'  ✗ Unexpected error for {card.name}: {str(e)}')
-                )
-        
-        # Save any remaining cards in the final batch
-        if cards_in_batch and not options['dry_run']:
-            with transaction.atomic():
-                for batch_card in cards_in_batch:
-                    batch_card.save()
-            batch_count += len(cards_in_batch)
-            self.stdout.write(f'Saved final batch of {len(cards_in_batch)} cards')
-        
+
+                last_id = chunk[-1].id
+                if total_cards > 50:
+                    self.stdout.write(f'Fetched {min((processed + 1) * COLLECTION_BATCH_SIZE, total_cards)}/{total_cards} cards')
+                if len(pending) >= options['batch_size']:
+                    write_batch()
+
+        # Save any remaining cards and the final position
+        write_batch()
+
         self.stdout.write(f'\n=== Summary ===')
         self.stdout.write(f'Total processed: {total_cards}')
         self.stdout.write(f'Successfully updated: {updated_count}')
         self.stdout.write(f'Errors: {error_count}')
         self.stdout.write(f'Success rate: {(updated_count/(updated_count+error_count)*100):.1f}%' if (updated_count+error_count) > 0 else 'N/A')
-        
-        if options['dry_run']:
+
+        if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN - No changes were made'))
         else:
-            self.stdout.write(self.style.SUCCESS(f'MTG data population complete! Updated {batch_count} cards in database.'))
\ No newline at end of file
+            self.stdout.write(self.style.SUCCESS(f'MTG data population complete! Updated {saved_count} cards in database.'))
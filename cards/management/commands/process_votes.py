@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from cards.vote_queue import process_pending_votes
+
+
+class Command(BaseCommand):
+    help = 'Apply queued votes to card ratings in batches (run as a worker when VOTE_QUEUE is enabled)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Maximum number of votes applied per rating period (default: 1000)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when the queue is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue once and exit instead of running forever',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            applied = process_pending_votes(options['batch_size'])
+            total += applied
+            if applied:
+                self.stdout.write(f'Applied {applied} votes (total: {total})')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Vote queue drained, applied {total} votes'))
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from cards.glicko2_vectorized import VectorizedGlicko2
+from cards.models import Card, Vote
+from cards.rating_periods import DEFAULT_RATING, DEFAULT_RATING_DEVIATION, DEFAULT_VOLATILITY
+
+
+class Command(BaseCommand):
+    help = 'Recompute all card ratings by replaying the vote log in Glicko-2 rating periods'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period-hours',
+            type=float,
+            default=24,
+            help='Length of each rating period in hours (default: 24)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of cards per bulk_update statement',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compute the new ratings without saving them',
+        )
+
+    def handle(self, *args, **options):
+        period = timedelta(hours=options['period_hours'])
+
+        # Everyone starts the replay from the default rating
+        card_ids = list(Card.objects.values_list('id', flat=True))
+        positions = {card_id: position for position, card_id in enumerate(card_ids)}
+        ratings = np.full(len(card_ids), DEFAULT_RATING)
+        rds = np.full(len(card_ids), DEFAULT_RATING_DEVIATION)
+        volatilities = np.full(len(card_ids), DEFAULT_VOLATILITY)
+        self.stdout.write(f'Replaying votes for {len(card_ids)} cards in {options["period_hours"]}h periods')
+
+        def rate(winners, losers):
+            return VectorizedGlicko2.rate_period(
+                ratings, rds, volatilities, winners, losers, max_inactive_rd=DEFAULT_RATING_DEVIATION
+            )
+
+        # Queued votes (applied=False) are left for process_votes to apply on top
+        votes = Vote.objects.filter(applied=True).order_by('created_at', 'id').values_list('winner_id', 'loser_id', 'created_at')
+
+        period_end = None
+        winners = []
+        losers = []
+        period_count = 0
+        vote_count = 0
+        for winner_id, loser_id, created_at in votes.iterator(chunk_size=5000):
+            if period_end is None:
+                period_end = created_at + period
+            while created_at >= period_end:
+                ratings, rds, volatilities = rate(winners, losers)
+                period_count += 1
+                winners = []
+                losers = []
+                period_end += period
+            winners.append(positions[winner_id])
+            losers.append(positions[loser_id])
+            vote_count += 1
+
+        if winners:
+            ratings, rds, volatilities = rate(winners, losers)
+            period_count += 1
+
+        self.stdout.write(f'Replayed {vote_count} votes over {period_count} rating periods')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN - No changes were made'))
+            return
+
+        cards = list(Card.objects.only('id', 'rating', 'rating_deviation', 'volatility'))
+        for card in cards:
+            position = positions[card.id]
+            card.rating = float(ratings[position])
+            card.rating_deviation = float(rds[position])
+            card.volatility = float(volatilities[position])
+
+        with transaction.atomic():
+            Card.bulk_update_ratings(cards, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Updated ratings for {len(cards)} cards'))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from cards.import_jobs import IMPORT_CHUNK_SIZE, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued bulk card imports from the suggest page (run as a worker when BACKGROUND_IMPORTS is enabled)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help=f'Lines imported between progress updates (default: {IMPORT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when no jobs are queued (default: 2)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the queued jobs once and exit instead of running forever',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            ran = run_pending_jobs(options['chunk_size'])
+            total += ran
+            if ran:
+                self.stdout.write(f'Ran {ran} import jobs (total: {total})')
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Import queue drained, ran {total} jobs'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0002_kernel_card_cmc_card_color_identity_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('voter_key', models.CharField(blank=True, default='', max_length=40)),
+                ('pair_token', models.CharField(blank=True, default='', max_length=100)),
+                ('loser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='losses', to='cards.card')),
+                ('winner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wins', to='cards.card')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='cards_vote_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0003_vote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='applied',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(condition=models.Q(('applied', False)), fields=['id'], name='cards_vote_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0004_vote_applied'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['-rating', 'rating_deviation', 'id'], name='cards_card_standings_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0005_card_standings_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScryfallCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scryfall_id', models.CharField(max_length=36, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('normalized_name', models.CharField(db_index=True, max_length=255)),
+                ('front_face_name', models.CharField(blank=True, db_index=True, default='', max_length=255)),
+                ('set_code', models.CharField(max_length=10)),
+                ('collector_number', models.CharField(max_length=20)),
+                ('released_at', models.DateField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['set_code', 'collector_number'], name='cards_scryfall_set_num_idx')],
+            },
+        ),
+    ]
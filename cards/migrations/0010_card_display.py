@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:13
+
+from django.db import migrations, models
+
+
+# A frozen copy of Card.get_display_payload as of this migration, so later
+# changes to the model don't change what the backfill writes
+
+def image_uri(image_uris, card_faces, face=0):
+    if card_faces and len(card_faces) > face:
+        face_image = card_faces[face].get('image_uris', {}).get('normal', '')
+        if face_image:
+            return face_image
+    if image_uris and 'normal' in image_uris:
+        return image_uris.get('normal', '')
+    if image_uris:
+        for size in ['large', 'border_crop', 'art_crop', 'png', 'small']:
+            if size in image_uris:
+                return image_uris[size]
+    return ''
+
+
+def display_payload(image_uris, card_faces, layout):
+    card_faces = card_faces or []
+    multiple_faces = len(card_faces) > 1
+    return {
+        'image_uri': image_uri(image_uris, card_faces, 0),
+        'image_uri_back': image_uri(image_uris, card_faces, 1) if multiple_faces else None,
+        'has_multiple_faces': multiple_faces,
+        'has_flippable_faces': multiple_faces and layout in ['transform', 'modal_dfc', 'reversible_card'],
+        'rotation_angle': {'battle': 90, 'flip': 180}.get(layout, 0),
+    }
+
+
+def fill_display(apps, schema_editor):
+    Card = apps.get_model('cards', 'Card')
+    cards = list(Card.objects.only('id', 'image_uris', 'card_faces', 'layout'))
+    for card in cards:
+        card.display = display_payload(card.image_uris, card.card_faces, card.layout)
+    Card.objects.bulk_update(cards, ['display'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0009_card_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='display',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(fill_display, migrations.RunPython.noop),
+    ]
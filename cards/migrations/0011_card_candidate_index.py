@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0010_card_display'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['num_colors', 'color_sort_key', 'cmc', 'name'], name='cards_card_candidate_idx'),
+        ),
+    ]
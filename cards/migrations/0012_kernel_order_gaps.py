@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:40
+
+from django.db import migrations
+
+
+def space_kernel_orders(apps, schema_editor):
+    # Respace existing kernels (keeping their current order) 1024 apart, the
+    # ORDER_STEP of cards.kernel_order at the time, so moves have gaps to use
+    Kernel = apps.get_model('cards', 'Kernel')
+    kernels = list(Kernel.objects.order_by('order', 'created_at').only('id', 'order'))
+    for position, kernel in enumerate(kernels):
+        kernel.order = (position + 1) * 1024
+    Kernel.objects.bulk_update(kernels, ['order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0011_card_candidate_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(space_kernel_orders, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 import json
-import random
 import math
 from .glicko2 import Glicko2
+from .page_cache import CARDS, STANDINGS, invalidate_pages
+from .sampler import get_sampler
+from .search import get_search_index
+from .standings import get_standings
 
 
 class Card(models.Model):
@@ -35,11 +39,58 @@ class Card(models.Model):
     num_colors = models.IntegerField(default=0)
     color_sort_key = models.CharField(max_length=20, default='')
     
+    # Precomputed display data (see get_display_payload), so voting and standings
+    # don't need to load and decode image_uris/card_faces
+    display = models.JSONField(default=dict)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    RATING_FIELDS = ['rating', 'rating_deviation', 'volatility']
+    
+    # Columns needed to render a card in a matchup or the standings
+    PAYLOAD_FIELDS = ['id', 'name', 'display', 'rating', 'rating_deviation', 'volatility']
+    
+    # Fields the display payload is derived from
+    DISPLAY_SOURCE_FIELDS = ['image_uris', 'card_faces', 'layout']
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-rating', 'rating_deviation', 'id'], name='cards_card_standings_idx'),
+            # Candidate bank sort order, walked by keyset pagination
+            models.Index(fields=['num_colors', 'color_sort_key', 'cmc', 'name'], name='cards_card_candidate_idx'),
+        ]
+    
+    # Card fields filled from Scryfall card data, besides name and scryfall_id
+    SCRYFALL_FIELDS = [
+        'image_uris', 'card_faces', 'layout', 'mana_cost', 'cmc', 'type_line', 'oracle_text',
+        'power', 'toughness', 'colors', 'color_identity', 'keywords',
+    ]
+    
     def save(self, *args, **kwargs):
-        # Calculate num_colors and color_sort_key for kernels functionality
+        update_fields = kwargs.get('update_fields')
+        
+        # Narrow saves (e.g. rating updates) leave the derived color fields alone
+        if update_fields is None or 'color_identity' in update_fields:
+            self.set_color_sort_fields()
+        if update_fields is None or set(update_fields) & set(self.DISPLAY_SOURCE_FIELDS):
+            self.display = self.get_display_payload()
+            if update_fields is not None:
+                kwargs['update_fields'] = list(update_fields) + ['display']
+        
+        super().save(*args, **kwargs)
+        self._rating_changed()
+        if update_fields is None or 'name' in update_fields:
+            get_search_index().update(self.id, self.name)
+        
+        if update_fields is not None and set(update_fields) <= set(self.RATING_FIELDS + ['updated_at']):
+            invalidate_pages(STANDINGS)
+        else:
+            invalidate_pages(CARDS, STANDINGS)
+    
+    def set_color_sort_fields(self):
+        """Calculate num_colors and color_sort_key for kernels functionality.
+        Called by save(); call it directly before bulk_create/bulk_update, which bypass save()."""
         self.num_colors = len(self.color_identity)
         
         # Create color sort key based on WUBRG order
@@ -49,8 +100,46 @@ class Card(models.Model):
         else:
             min_color = min(color_order.get(c, 6) for c in self.color_identity)
             self.color_sort_key = f"{min_color}_{self.color_identity[0] if self.color_identity else 'colorless'}"
+    
+    @classmethod
+    def from_scryfall(cls, card_data):
+        """Build an unsaved Card from a Scryfall card object, with derived sort fields filled in"""
+        card = cls(
+            name=card_data['name'],
+            scryfall_id=card_data['id'],
+            image_uris=card_data.get('image_uris', {}),
+            card_faces=card_data.get('card_faces', []),
+            layout=card_data.get('layout', 'normal'),
+            mana_cost=card_data.get('mana_cost', ''),
+            cmc=card_data.get('cmc', 0),
+            type_line=card_data.get('type_line', ''),
+            oracle_text=card_data.get('oracle_text', ''),
+            power=card_data.get('power'),
+            toughness=card_data.get('toughness'),
+            colors=card_data.get('colors', []),
+            color_identity=card_data.get('color_identity', []),
+            keywords=card_data.get('keywords', []),
+        )
+        card.set_color_sort_fields()
+        card.display = card.get_display_payload()
+        return card
+    
+    def delete(self, *args, **kwargs):
+        card_id = self.id
+        result = super().delete(*args, **kwargs)
+        get_sampler().remove(card_id)
+        get_standings().remove(card_id)
+        get_search_index().remove(card_id)
+        invalidate_pages(CARDS, STANDINGS)
         
-        super().save(*args, **kwargs)
+        from .pair_pool import get_pair_pool
+        get_pair_pool().invalidate(card_id)
+        return result
+    
+    def _rating_changed(self):
+        """Keep the in-memory pair sampler and standings snapshot in step with this card's rating"""
+        get_sampler().update(self.id, self.rating, self.rating_deviation)
+        get_standings().update(self.id, self.rating, self.rating_deviation)
     
     def __str__(self):
         return self.name
@@ -106,51 +195,186 @@ class Card(models.Model):
             return 180
         return 0
     
+    def get_scryfall_data(self):
+        """This card's stored data in Scryfall's API shape, as the suggest page expects it"""
+        data = {'id': self.scryfall_id, 'name': self.name}
+        data.update({field: getattr(self, field) for field in self.SCRYFALL_FIELDS})
+        return data
+    
+    def get_display_payload(self):
+        """Image URLs, face flags and rotation for displaying this card; stored in `display` on save"""
+        return {
+            'image_uri': self.get_image_uri(0),
+            'image_uri_back': self.get_image_uri(1) if self.has_multiple_faces() else None,
+            'has_multiple_faces': self.has_multiple_faces(),
+            'has_flippable_faces': self.has_flippable_faces(),
+            'rotation_angle': self.get_rotation_angle()
+        }
+    
+    def get_vote_payload(self):
+        """Display data for a card in a head-to-head matchup. Only needs the PAYLOAD_FIELDS columns."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            **(self.display or self.get_display_payload())
+        }
+    
     @classmethod
     def update_ratings_after_vote(cls, winner_card, loser_card):
-        """Update ratings for two cards after a head-to-head vote"""
-        new_winner_rating, new_winner_rd, new_winner_vol, new_loser_rating, new_loser_rd, new_loser_vol = Glicko2.update_ratings(
-            winner_card.rating, winner_card.rating_deviation, winner_card.volatility,
-            loser_card.rating, loser_card.rating_deviation, loser_card.volatility,
-            1.0  # Winner gets outcome = 1.0
-        )
+        """
+        Update ratings for two cards after a head-to-head vote.
         
-        # Update winner
-        winner_card.rating = new_winner_rating
-        winner_card.rating_deviation = new_winner_rd
-        winner_card.volatility = new_winner_vol
-        winner_card.save()
+        Both rows are re-read under a row lock inside a short transaction, so
+        concurrent votes on the same card are applied one after another instead
+        of overwriting each other, and only the rating columns are written.
+        """
+        with transaction.atomic():
+            # Lock in id order so two votes on the same pair cannot deadlock
+            locked = {
+                card.id: card
+                for card in cls.objects.select_for_update()
+                .only('id', 'rating', 'rating_deviation', 'volatility')
+                .filter(id__in=[winner_card.id, loser_card.id])
+                .order_by('id')
+            }
+            winner = locked[winner_card.id]
+            loser = locked[loser_card.id]
+            
+            new_winner_rating, new_winner_rd, new_winner_vol, new_loser_rating, new_loser_rd, new_loser_vol = Glicko2.update_ratings(
+                winner.rating, winner.rating_deviation, winner.volatility,
+                loser.rating, loser.rating_deviation, loser.volatility,
+                1.0  # Winner gets outcome = 1.0
+            )
+            
+            # Update winner
+            winner_card.rating = new_winner_rating
+            winner_card.rating_deviation = new_winner_rd
+            winner_card.volatility = new_winner_vol
+            winner_card.save(update_fields=cls.RATING_FIELDS + ['updated_at'])
+            
+            # Update loser
+            loser_card.rating = new_loser_rating
+            loser_card.rating_deviation = new_loser_rd
+            loser_card.volatility = new_loser_vol
+            loser_card.save(update_fields=cls.RATING_FIELDS + ['updated_at'])
+    
+    @classmethod
+    def bulk_update_ratings(cls, cards, batch_size=500):
+        """Write the rating fields of many cards with a single bulk_update"""
+        now = timezone.now()
+        for card in cards:
+            card.updated_at = now
+        cls.objects.bulk_update(cards, cls.RATING_FIELDS + ['updated_at'], batch_size=batch_size)
         
-        # Update loser
-        loser_card.rating = new_loser_rating
-        loser_card.rating_deviation = new_loser_rd
-        loser_card.volatility = new_loser_vol
-        loser_card.save()
+        for card in cards:
+            card._rating_changed()
+        invalidate_pages(STANDINGS)
     
     @classmethod
     def get_random_pair_for_voting(cls):
         """Get a random pair of cards for head-to-head voting, with preference for high uncertainty cards"""
-        all_cards = list(cls.objects.all())
-        
-        if len(all_cards) < 2:
-            return None, None
-        
-        # Create weights based on rating deviation (higher RD = higher weight)
-        # Add a base weight so all cards have some chance of being selected
-        base_weight = 1.0
-        weights = [base_weight + card.rating_deviation / 100.0 for card in all_cards]
-        
-        # Select first card using weighted random
-        card1 = random.choices(all_cards, weights=weights)[0]
-        
-        # Remove selected card and its weight for second selection
-        remaining_cards = [card for card in all_cards if card.id != card1.id]
-        remaining_weights = [weights[i] for i, card in enumerate(all_cards) if card.id != card1.id]
-        
-        # Select second card
-        card2 = random.choices(remaining_cards, weights=remaining_weights)[0]
-        
-        return card1, card2
+        # Weights (1 + RD/100) are maintained incrementally by the sampler, so only the two chosen rows are loaded
+        return get_sampler().sample_pair(cls.objects.only(*cls.PAYLOAD_FIELDS))
+
+
+class Vote(models.Model):
+    """Append-only record of a single head-to-head result"""
+    winner = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='wins')
+    loser = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='losses')
+    created_at = models.DateTimeField(default=timezone.now)
+    voter_key = models.CharField(max_length=40, blank=True, default='')  # session key of the voter
+    pair_token = models.CharField(max_length=100, blank=True, default='')  # signed token of the pair that was served
+    applied = models.BooleanField(default=True)  # False while waiting in the vote queue
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='cards_vote_created_idx'),
+            models.Index(fields=['id'], condition=models.Q(applied=False), name='cards_vote_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.winner_id} beat {self.loser_id}"
+
+
+class ScryfallCard(models.Model):
+    """Local copy of a card from a Scryfall bulk-data file, for lookups without the network"""
+    scryfall_id = models.CharField(max_length=36, unique=True)
+    name = models.CharField(max_length=255)
+    normalized_name = models.CharField(max_length=255, db_index=True)
+    front_face_name = models.CharField(max_length=255, blank=True, default='', db_index=True)  # normalized, for "A // B" cards
+    set_code = models.CharField(max_length=10)
+    collector_number = models.CharField(max_length=20)
+    released_at = models.DateField(null=True, blank=True)
+    data = models.JSONField(default=dict)  # the card fields we use, in Scryfall's API shape
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['set_code', 'collector_number'], name='cards_scryfall_set_num_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.set_code} {self.collector_number})"
+
+
+class ImportJob(models.Model):
+    """A pasted card list waiting for, or being worked through by, the `run_import_jobs` worker"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    lines = models.JSONField(default=list)  # card names / Scryfall URLs, one per entry
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)  # lines handled so far; a restarted job resumes here
+    added = models.IntegerField(default=0)
+    existed = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0)
+    error_details = models.JSONField(default=list)
+    failure = models.TextField(blank=True, default='')  # exception that stopped the job, if any
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(status__in=['pending', 'running']),
+                         name='cards_importjob_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"Import job {self.id} ({self.status}, {self.processed}/{self.total})"
+
+    def get_progress(self):
+        """Progress report for the suggest page, in the same shape as a finished bulk add"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'added': self.added,
+            'existed': self.existed,
+            'errors': self.errors,
+            'error_details': self.error_details,
+            'failure': self.failure,
+        }
+
+
+class BackfillCheckpoint(models.Model):
+    """How far a resumable management command has got, keyed on the id of the last card it finished"""
+    name = models.CharField(max_length=100, unique=True)  # command name
+    last_id = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} at card {self.last_id}"
 
 
 class Kernel(models.Model):
@@ -0,0 +1,79 @@
+"""
+Page caching that lasts until the next write.
+
+Cached pages are keyed on a generation number per scope, so invalidating a
+scope is a single counter bump and every page cached under the old number
+simply stops being looked up (and ages out of the cache). Writes call
+`invalidate_pages` for the scopes they affect:
+
+- CARDS: the set of cards or their details changed (add, update, delete)
+- STANDINGS: ratings changed (votes, rating periods), or the cards did
+
+With the default local-memory backend each process has its own cache, so
+invalidations only reach the process that made the write and other
+processes catch up after PAGE_CACHE_TIMEOUT. Use the file or Redis backend
+(CACHE_BACKEND) to share pages and invalidations between processes.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+CARDS = 'cards'
+STANDINGS = 'standings'
+
+
+def _generation_key(scope):
+    return f'page_cache:generation:{scope}'
+
+
+def _generations(scopes):
+    keys = [_generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Start from the clock rather than 0, so a generation that was evicted
+            # can never come back to a number that old pages were cached under
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def invalidate_pages(*scopes):
+    """Drop every cached page in the given scopes"""
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def cache_page_until_write(*scopes):
+    """
+    Cache a GET view's successful responses until one of `scopes` is invalidated
+    (or PAGE_CACHE_TIMEOUT passes). Responses are keyed on the full path, so
+    each page of a paginated view is cached separately.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            generations = '.'.join(str(generation) for generation in _generations(scopes))
+            key = f'page_cache:{view.__name__}:{generations}:{request.get_full_path()}'
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, (response.content, response['Content-Type']),
+                          getattr(settings, 'PAGE_CACHE_TIMEOUT', 60))
+            return response
+        return wrapper
+    return decorator
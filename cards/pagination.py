@@ -0,0 +1,111 @@
+import base64
+import json
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor pagination over a multi-column ordering whose last column is unique.
+
+    The cursor holds the ordering values of the last row on the page, and the
+    next page is the rows strictly after it: (a > x) OR (a = x AND b > y) ...,
+    which an index on the ordering columns answers without counting or
+    skipping rows. DRF's CursorPagination only keys on the first column and
+    falls back to offsets within ties, which is most of the work for a
+    low-cardinality first column such as num_colors.
+
+    Subclasses set `ordering` (ascending field paths, last one unique).
+    Responses look like {'count': n, 'next': url or None, 'results': [...]}.
+    The total is only counted for the first page (no cursor); following pages
+    return a count of None rather than re-counting the whole result set.
+    """
+    ordering = []
+    cursor_query_param = 'cursor'
+    page_size = 100
+    page_size_query_param = 'limit'
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        self.count = None if cursor else queryset.count()
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Must be an integer'})
+        return min(max(size, 1), self.max_page_size)
+
+    def after(self, values):
+        """Filter for rows strictly after `values` in the ordering"""
+        conditions = []
+        for i, field in enumerate(self.ordering):
+            equal = {previous: value for previous, value in zip(self.ordering[:i], values)}
+            conditions.append(Q(**equal, **{f'{field}__gt': values[i]}))
+        return reduce(lambda a, b: a | b, conditions)
+
+    def position(self, row):
+        """Ordering values of a row"""
+        values = []
+        for field in self.ordering:
+            value = row
+            for part in field.split('__'):
+                value = getattr(value, part)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError, UnicodeError):
+            values = None
+        if (not isinstance(values, list) or len(values) != len(self.ordering)
+                or not all(isinstance(value, (str, int, float)) and not isinstance(value, bool)
+                           for value in values)):
+            # Each value is compared with a column, so only plain scalars are allowed
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor'})
+        return values
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.position(self.page[-1])))
+
+    def get_paginated_response(self, data):
+        return Response({'count': self.count, 'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class CandidatePagination(KeysetCursorPagination):
+    """Candidates in kernel sort order: colors, color group, mana value, then name (unique)"""
+    ordering = ['card__num_colors', 'card__color_sort_key', 'card__cmc', 'card__name']
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connections
+
+from .vote_log import make_pair_token
+
+
+class PairPool:
+    """
+    Ring of pre-sampled, pre-serialized voting pairs.
+
+    Serving a matchup is a pop from memory; when the pool drops below
+    `low_water` a background thread samples more pairs until it is full again.
+    Entries older than `max_age` seconds are discarded so pairs drawn from
+    stale weights (or cards deleted by another process) do not linger, and
+    `invalidate` drops every entry containing a card that was edited or deleted.
+    Invalidation only reaches this process's pool: a card deleted or edited in
+    another worker can still be served from here for up to `max_age` seconds.
+    A `size` of 0 or less disables pooling and samples every pair on demand.
+    """
+
+    def __init__(self, size=50, low_water=10, max_age=60):
+        self.size = size
+        self.low_water = low_water
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.pairs = deque()
+        self.refilling = False
+
+    @staticmethod
+    def sample():
+        """Sample and serialize one pair, or None if there are fewer than 2 cards"""
+        from .models import Card
+
+        card1, card2 = Card.get_random_pair_for_voting()
+        if not card1 or not card2:
+            return None
+        return {
+            'card1': card1.get_vote_payload(),
+            'card2': card2.get_vote_payload(),
+            'pair_token': make_pair_token(card1.id, card2.id)
+        }
+
+    def pop(self):
+        """Return the next pair, sampling one on the spot if the pool is empty"""
+        if self.size <= 0:
+            return self.sample()
+
+        pair = None
+        with self.lock:
+            expires = time.monotonic() - self.max_age
+            while self.pairs and self.pairs[0][0] < expires:
+                self.pairs.popleft()
+            if self.pairs:
+                pair = self.pairs.popleft()[1]
+            start_refill = len(self.pairs) < self.low_water and not self.refilling
+            if start_refill:
+                self.refilling = True
+
+        if start_refill:
+            threading.Thread(target=self._refill, daemon=True).start()
+
+        return pair or self.sample()
+
+    def invalidate(self, card_id):
+        """Drop every pooled pair that contains card_id"""
+        with self.lock:
+            self.pairs = deque(
+                entry for entry in self.pairs
+                if card_id not in (entry[1]['card1']['id'], entry[1]['card2']['id'])
+            )
+
+    def clear(self):
+        with self.lock:
+            self.pairs.clear()
+
+    def _refill(self):
+        try:
+            while True:
+                with self.lock:
+                    if len(self.pairs) >= self.size:
+                        return
+                pair = self.sample()
+                if pair is None:
+                    return
+                with self.lock:
+                    self.pairs.append((time.monotonic(), pair))
+        finally:
+            with self.lock:
+                self.refilling = False
+            connections.close_all()
+
+
+_pair_pool = PairPool(
+    size=getattr(settings, 'PAIR_POOL_SIZE', 50),
+    low_water=getattr(settings, 'PAIR_POOL_LOW_WATER', 10),
+)
+
+
+def get_pair_pool():
+    """Return the process-wide pair pool"""
+    return _pair_pool
@@ -0,0 +1,93 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from .glicko2 import Glicko2
+
+DEFAULT_RATING = 1500.0
+DEFAULT_RATING_DEVIATION = 350.0
+DEFAULT_VOLATILITY = 0.06
+
+
+def compute_rating_period(ratings, matches, decay_inactive=False):
+    """
+    Run one Glicko-2 rating period.
+
+    All matches are rated against the ratings as they stood at the start of the
+    period, and each card is updated once with its full list of results.
+
+    Args:
+        ratings: dict of card_id -> (rating, rating_deviation, volatility)
+        matches: iterable of (winner_id, loser_id) pairs played during the period
+        decay_inactive: also grow the RD of cards that played no games, as the
+            spec does at the end of each period
+
+    Returns:
+        dict: card_id -> (rating, rating_deviation, volatility) for every card that changed
+    """
+    scaled = {
+        card_id: (Glicko2.scale_down(rating), Glicko2.scale_rd_down(rd), vol)
+        for card_id, (rating, rd, vol) in ratings.items()
+    }
+
+    results = defaultdict(list)
+    for winner_id, loser_id in matches:
+        winner_mu, winner_phi, _ = scaled[winner_id]
+        loser_mu, loser_phi, _ = scaled[loser_id]
+        results[winner_id].append((loser_mu, loser_phi, 1.0))
+        results[loser_id].append((winner_mu, winner_phi, 0.0))
+
+    card_ids = scaled.keys() if decay_inactive else results.keys()
+
+    updated = {}
+    for card_id in card_ids:
+        mu, phi, sigma = scaled[card_id]
+        new_mu, new_phi, new_sigma = Glicko2._update_single_player(mu, phi, sigma, results.get(card_id, []))
+        new_rd = Glicko2.scale_rd_up(new_phi)
+        if card_id not in results:
+            # Inactivity never makes a card more uncertain than an unrated one
+            new_rd = min(new_rd, DEFAULT_RATING_DEVIATION)
+        updated[card_id] = (Glicko2.scale_up(new_mu), new_rd, new_sigma)
+
+    return updated
+
+
+def apply_rating_period(matches):
+    """
+    Apply a batch of (winner_id, loser_id) matches to the database as one rating period.
+
+    Only the cards involved are loaded (rating columns only, locked for the
+    duration of the transaction) and all of them are written back with a single
+    bulk_update. Matches referring to cards that no longer exist are skipped.
+
+    Returns:
+        int: number of cards updated
+    """
+    from .models import Card
+
+    matches = list(matches)
+    card_ids = {card_id for match in matches for card_id in match}
+    if not card_ids:
+        return 0
+
+    with transaction.atomic():
+        cards = {
+            card.id: card
+            for card in Card.objects.select_for_update()
+            .only('id', 'rating', 'rating_deviation', 'volatility')
+            .filter(id__in=card_ids)
+            .order_by('id')
+        }
+        ratings = {card_id: (card.rating, card.rating_deviation, card.volatility) for card_id, card in cards.items()}
+        matches = [(w, l) for w, l in matches if w in cards and l in cards]
+
+        updated = compute_rating_period(ratings, matches)
+        for card_id, (rating, rd, vol) in updated.items():
+            card = cards[card_id]
+            card.rating = rating
+            card.rating_deviation = rd
+            card.volatility = vol
+
+        Card.bulk_update_ratings([cards[card_id] for card_id in updated])
+
+    return len(updated)
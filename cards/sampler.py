@@ -0,0 +1,291 @@
+import bisect
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from .glicko2 import Glicko2
+
+
+def voting_weight(rating_deviation):
+    """Selection weight for a card: higher RD = higher weight, with a base weight
+    so all cards have some chance of being selected (even with a bad RD of 0 or less)"""
+    return 1.0 + max(rating_deviation, 0.0) / 100.0
+
+
+def expected_information(rating1, rd1, rating2, rd2):
+    """
+    Expected reduction in rating variance (Glicko-2 scale) from one game between two cards.
+
+    A game is most informative when both cards are uncertain and the outcome is
+    close to a coin flip, so blowouts between distant ratings score near zero.
+    """
+    mu1, phi1 = Glicko2.scale_down(rating1), Glicko2.scale_rd_down(rd1)
+    mu2, phi2 = Glicko2.scale_down(rating2), Glicko2.scale_rd_down(rd2)
+    p = Glicko2.E(mu1, mu2, phi2)
+    q = Glicko2.E(mu2, mu1, phi1)
+    info1 = Glicko2.g(phi2)**2 * p * (1 - p)
+    info2 = Glicko2.g(phi1)**2 * q * (1 - q)
+    # phi^2 - 1 / (1/phi^2 + I) for each side
+    return phi1**4 * info1 / (1 + phi1**2 * info1) + phi2**4 * info2 / (1 + phi2**2 * info2)
+
+
+class FenwickTree:
+    """
+    Binary indexed tree over non-negative weights.
+    Supports point updates, prefix sums and weighted sampling in O(log n).
+    """
+
+    def __init__(self, weights=()):
+        self.size = 0
+        self.tree = [0.0]
+        self.weights = []
+        for weight in weights:
+            self.append(weight)
+
+    def append(self, weight):
+        """Add a new slot at the end of the tree and return its index"""
+        self.size += 1
+        index = self.size
+        # A new node covers the range (index - lowbit(index), index]
+        total = weight
+        child = index - 1
+        stop = index - (index & -index)
+        while child > stop:
+            total += self.tree[child]
+            child -= child & -child
+        self.tree.append(total)
+        self.weights.append(weight)
+        return index - 1
+
+    def update(self, slot, weight):
+        """Set the weight of a slot"""
+        diff = weight - self.weights[slot]
+        self.weights[slot] = weight
+        index = slot + 1
+        while index <= self.size:
+            self.tree[index] += diff
+            index += index & -index
+
+    def total(self):
+        """Sum of all weights"""
+        total = 0.0
+        index = self.size
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, target):
+        """Find the slot whose cumulative weight range contains target"""
+        index = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            next_index = index + step
+            if next_index <= self.size and self.tree[next_index] <= target:
+                index = next_index
+                target -= self.tree[next_index]
+            step >>= 1
+        return min(index, self.size - 1)
+
+
+class PairSampler:
+    """
+    In-process weighted sampler over card ids, keyed on rating deviation.
+
+    Weights are loaded from the database once (id, rating and rating_deviation
+    only) and then kept current incrementally as ratings change, so drawing a
+    pair is O(log n) and never touches the card rows themselves. Each worker
+    process holds its own copy, which is rebuilt every `refresh_interval`
+    seconds to pick up cards added or removed by other processes.
+
+    Two matchmaking modes are supported:
+        random: both cards drawn independently by RD weight
+        information: the first card is drawn by RD weight and its opponent is
+            chosen among the `window` nearest cards on either side in a
+            rating-sorted index, weighted by expected information gain
+    """
+
+    MODES = ('random', 'information')
+
+    def __init__(self, refresh_interval=300, mode='random', window=16):
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown matchmaking mode: {mode}')
+        if window < 1:
+            raise ValueError(f'Matchmaking window must be at least 1, got {window}')
+        self.refresh_interval = refresh_interval
+        self.mode = mode
+        self.window = window
+        self.lock = threading.Lock()
+        self.tree = None
+        self.slots = {}
+        self.card_ids = []
+        self.free_slots = []
+        self.ratings = {}
+        self.by_rating = []
+        self.loaded_at = 0.0
+
+    def _load(self):
+        from .models import Card
+
+        rows = list(Card.objects.values_list('id', 'rating', 'rating_deviation'))
+        self.tree = FenwickTree(voting_weight(rd) for _, _, rd in rows)
+        self.card_ids = [card_id for card_id, _, _ in rows]
+        self.slots = {card_id: slot for slot, card_id in enumerate(self.card_ids)}
+        self.free_slots = []
+        self.ratings = {card_id: (rating, rd) for card_id, rating, rd in rows}
+        self.by_rating = sorted((rating, card_id) for card_id, rating, _ in rows)
+        self.loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self.tree is None or time.monotonic() - self.loaded_at > self.refresh_interval:
+            self._load()
+
+    def invalidate(self):
+        """Force a reload from the database on next use"""
+        with self.lock:
+            self.tree = None
+
+    def __len__(self):
+        with self.lock:
+            self._ensure_loaded()
+            return len(self.slots)
+
+    def __contains__(self, card_id):
+        with self.lock:
+            self._ensure_loaded()
+            return card_id in self.slots
+
+    def update(self, card_id, rating, rating_deviation):
+        """Add a card or update its rating and weight. No-op until the sampler has been loaded."""
+        with self.lock:
+            if self.tree is None:
+                return
+            self._unindex(card_id)
+            self.ratings[card_id] = (rating, rating_deviation)
+            bisect.insort(self.by_rating, (rating, card_id))
+
+            weight = voting_weight(rating_deviation)
+            slot = self.slots.get(card_id)
+            if slot is None:
+                if self.free_slots:
+                    slot = self.free_slots.pop()
+                    self.card_ids[slot] = card_id
+                    self.tree.update(slot, weight)
+                else:
+                    slot = self.tree.append(weight)
+                    self.card_ids.append(card_id)
+                self.slots[card_id] = slot
+            else:
+                self.tree.update(slot, weight)
+
+    def remove(self, card_id):
+        """Remove a card so it can no longer be drawn"""
+        with self.lock:
+            if self.tree is None:
+                return
+            self._remove(card_id)
+
+    def _unindex(self, card_id):
+        old = self.ratings.pop(card_id, None)
+        if old is not None:
+            position = bisect.bisect_left(self.by_rating, (old[0], card_id))
+            if position < len(self.by_rating) and self.by_rating[position] == (old[0], card_id):
+                del self.by_rating[position]
+
+    def _remove(self, card_id):
+        self._unindex(card_id)
+        slot = self.slots.pop(card_id, None)
+        if slot is not None:
+            self.tree.update(slot, 0.0)
+            self.card_ids[slot] = None
+            self.free_slots.append(slot)
+
+    def _draw(self, exclude=None):
+        while True:
+            card_id = self.card_ids[self.tree.find(random.random() * self.tree.total())]
+            # Rounding can land on a zero-weight slot at the very end of the tree
+            if card_id is not None and card_id != exclude:
+                return card_id
+
+    def sample_pair_ids(self):
+        """Draw two distinct card ids, weighted by rating deviation. Returns (None, None) if fewer than 2 cards."""
+        with self.lock:
+            self._ensure_loaded()
+            if len(self.slots) < 2:
+                return None, None
+
+            first_id = self._draw()
+            if self.mode == 'information':
+                return first_id, self._draw_informative_opponent(first_id)
+
+            # Exclude the first card from the second draw by zeroing its weight
+            first_slot = self.slots[first_id]
+            first_weight = self.tree.weights[first_slot]
+            self.tree.update(first_slot, 0.0)
+            try:
+                second_id = self._draw(exclude=first_id)
+            finally:
+                self.tree.update(first_slot, first_weight)
+
+            return first_id, second_id
+
+    def _draw_informative_opponent(self, card_id):
+        """Pick an opponent near card_id in rating, weighted by expected information gain"""
+        rating, rd = self.ratings[card_id]
+        position = bisect.bisect_left(self.by_rating, (rating, card_id))
+        neighbours = (
+            self.by_rating[max(0, position - self.window):position] +
+            self.by_rating[position + 1:position + 1 + self.window]
+        )
+
+        candidates = [opponent_id for _, opponent_id in neighbours]
+        if not candidates:
+            return self._draw_uniform_opponent(card_id)
+        scores = [
+            expected_information(rating, rd, *self.ratings[opponent_id])
+            for opponent_id in candidates
+        ]
+        if not any(score > 0 and math.isfinite(score) for score in scores):
+            return random.choice(candidates)
+        return random.choices(candidates, weights=scores)[0]
+
+    def _draw_uniform_opponent(self, card_id):
+        """Any other card, uniformly"""
+        while True:
+            opponent_id = random.choice(self.card_ids)
+            if opponent_id is not None and opponent_id != card_id:
+                return opponent_id
+
+    def sample_pair(self, queryset, attempts=3):
+        """
+        Draw a pair and fetch just those two rows from queryset.
+        Ids whose rows have disappeared (deleted in another process) are dropped and the draw retried.
+        """
+        for _ in range(attempts):
+            first_id, second_id = self.sample_pair_ids()
+            if first_id is None:
+                return None, None
+
+            cards = queryset.in_bulk([first_id, second_id])
+            if len(cards) == 2:
+                return cards[first_id], cards[second_id]
+
+            for card_id in (first_id, second_id):
+                if card_id not in cards:
+                    self.remove(card_id)
+
+        return None, None
+
+
+_sampler = PairSampler(
+    mode=getattr(settings, 'MATCHMAKING_MODE', 'random'),
+    window=getattr(settings, 'MATCHMAKING_WINDOW', 16),
+)
+
+
+def get_sampler():
+    """Return the process-wide pair sampler"""
+    return _sampler
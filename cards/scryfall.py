@@ -0,0 +1,319 @@
+"""
+Shared Scryfall API client.
+
+All Scryfall traffic goes through one pooled keep-alive session and a shared
+token bucket, so concurrent callers together stay within Scryfall's published
+limit of 10 requests per second. Rate-limited (429) and server error (5xx)
+responses are retried with exponential backoff, honouring Retry-After.
+
+When a bulk-data file has been loaded with `import_scryfall_bulk`, lookups are
+answered from the local ScryfallCard index first and only misses go to the
+network (or nowhere, with SCRYFALL_OFFLINE).
+
+Responses that do go to the network are kept in an on-disk cache
+(SCRYFALL_CACHE_PATH), so repeated lookups of the same card skip Scryfall
+until the entry's TTL runs out, after which it is revalidated with its ETag.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .bulk_data import lookup_local
+from .http_cache import ResponseCache, cache_key
+
+SCRYFALL_API = 'https://api.scryfall.com'
+USER_AGENT = 'MTG-Cube-App/1.0'
+
+# Scryfall asks for 50-100ms between requests, i.e. at most 10 per second
+REQUESTS_PER_SECOND = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Maximum identifiers per /cards/collection request
+COLLECTION_BATCH_SIZE = 75
+
+# Responses worth remembering: found, and definitely not found
+CACHEABLE_STATUSES = {200, 404}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def parse_card_url(url):
+    """Extract (set code, collector number) from a scryfall.com card URL, or None"""
+    if '/card/' not in url:
+        return None
+    # Get everything after /card/ and remove any query parameters
+    full_path = url.split('/card/', 1)[1].split('?')[0]
+    # Split by '/' and take only set and collector number (first 2 parts)
+    path_parts = full_path.split('/')
+    if len(path_parts) < 2 or not path_parts[0] or not path_parts[1]:
+        return None
+    return path_parts[0], path_parts[1]
+
+
+def identifier_for_line(line):
+    """Collection API identifier for a line of user input (card name or Scryfall URL), or None"""
+    if 'scryfall.com' in line:
+        parsed = parse_card_url(line)
+        if not parsed:
+            return None
+        set_code, collector_number = parsed
+        return {'set': set_code, 'collector_number': collector_number}
+    return {'name': line}
+
+
+def _identifier_key(identifier):
+    if 'id' in identifier:
+        return ('id', identifier['id'])
+    if 'set' in identifier:
+        return ('set', identifier['set'].lower(), str(identifier['collector_number']).lower())
+    return ('name', identifier['name'].strip().lower())
+
+
+def _card_keys(card_data):
+    """Every identifier key a card returned by Scryfall can be matched by"""
+    keys = [
+        ('id', card_data.get('id')),
+        ('set', card_data.get('set', '').lower(), str(card_data.get('collector_number', '')).lower()),
+        ('name', card_data.get('name', '').lower()),
+    ]
+    # Multi-faced cards can also be requested by the name of a single face
+    for face in card_data.get('card_faces', []):
+        if face.get('name'):
+            keys.append(('name', face['name'].lower()))
+    return keys
+
+
+class ScryfallClient:
+    """Rate-limited, retrying Scryfall client safe to share between threads"""
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, max_retries=5, pool_size=16, timeout=15,
+                 local_index=False, offline=False, cache=None):
+        self.local_index = local_index
+        self.offline = offline
+        self.cache = cache
+        self.bucket = TokenBucket(rate, capacity=2)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Accept': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, **kwargs):
+        """Send a request, retrying 429/5xx responses and connection errors with backoff"""
+        kwargs.setdefault('timeout', self.timeout)
+        url = path if path.startswith('http') else f'{SCRYFALL_API}{path}'
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            time.sleep(self._backoff(attempt, response.headers.get('Retry-After')))
+
+        return response
+
+    @staticmethod
+    def _backoff(attempt, retry_after=None):
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return min(30, 0.5 * 2**attempt) + random.uniform(0, 0.25)
+
+    def get_json(self, path, params=None):
+        """GET a path and return the decoded JSON, or None if it was not found"""
+        if self.cache is None:
+            response = self.request('GET', path, params=params)
+            return response.json() if response.status_code == 200 else None
+
+        key = cache_key('GET', path, params)
+        cached = self.cache.get(key)
+        if cached and cached.is_fresh(self.cache.ttl):
+            return cached.json() if cached.status == 200 else None
+
+        headers = cached.conditional_headers() if cached else {}
+        response = self.request('GET', path, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            self.cache.refresh(key)
+            return cached.json() if cached.status == 200 else None
+        if response.status_code in CACHEABLE_STATUSES:
+            self.cache.set(key, response.status_code, response.text,
+                           response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.json() if response.status_code == 200 else None
+
+    def post_json(self, path, payload):
+        """POST a JSON payload and return the decoded response, raising on HTTP errors"""
+        key = cache_key('POST', path, payload=payload)
+        cached = self.cache.get(key) if self.cache else None
+        if cached and cached.is_fresh(self.cache.ttl):
+            return cached.json()
+
+        response = self.request('POST', path, json=payload)
+        response.raise_for_status()
+        if self.cache:
+            self.cache.set(key, response.status_code, response.text)
+        return response.json()
+
+    def _lookup_local(self, identifier):
+        if not self.local_index:
+            return None
+        return lookup_local([identifier])[0]
+
+    def card_by_name(self, name):
+        """Look up a card by name, trying an exact match before a fuzzy one"""
+        local = self._lookup_local({'name': name})
+        if local or self.offline:
+            return local
+        return (self.get_json('/cards/named', params={'exact': name}) or
+                self.get_json('/cards/named', params={'fuzzy': name}))
+
+    def card_by_url(self, url):
+        """Look up the printing a scryfall.com card URL points at"""
+        parsed = parse_card_url(url)
+        if not parsed:
+            return None
+        set_code, collector_number = parsed
+        local = self._lookup_local({'set': set_code, 'collector_number': collector_number})
+        if local or self.offline:
+            return local
+        return self.get_json(f'/cards/{set_code}/{collector_number}')
+
+    def card_by_id(self, scryfall_id):
+        local = self._lookup_local({'id': scryfall_id})
+        if local or self.offline:
+            return local
+        return self.get_json(f'/cards/{scryfall_id}')
+
+    def collection(self, identifiers):
+        """
+        Look up many cards through /cards/collection, 75 identifiers per request.
+
+        Args:
+            identifiers: list of dicts such as {'name': ...}, {'id': ...} or {'set': ..., 'collector_number': ...}
+
+        Returns:
+            list: card data (or None if not found) for each identifier, in the same order
+        """
+        results = lookup_local(identifiers) if self.local_index else [None] * len(identifiers)
+        misses = [identifier for identifier, card_data in zip(identifiers, results) if card_data is None]
+        if not misses or self.offline:
+            return results
+
+        found = {}
+        for start in range(0, len(misses), COLLECTION_BATCH_SIZE):
+            batch = misses[start:start + COLLECTION_BATCH_SIZE]
+            response = self.post_json('/cards/collection', {'identifiers': batch})
+            for card_data in response.get('data', []):
+                for key in _card_keys(card_data):
+                    found.setdefault(key, card_data)
+
+        return [
+            card_data or found.get(_identifier_key(identifier))
+            for identifier, card_data in zip(identifiers, results)
+        ]
+
+    def cards_by_ids(self, scryfall_ids):
+        """Look up many cards by Scryfall id. Returns a dict of id -> card data for those found."""
+        results = self.collection([{'id': scryfall_id} for scryfall_id in scryfall_ids])
+        return {card_data['id']: card_data for card_data in results if card_data}
+
+    def resolve_lines(self, lines, workers=8):
+        """
+        Resolve lines of user input (card names or Scryfall URLs) in bulk.
+
+        Everything is first looked up through the collection endpoint; only
+        names it could not match exactly fall back to individual fuzzy lookups.
+
+        Returns:
+            list: card data (or None if not found) for each line, in the same order
+        """
+        identifiers = [identifier_for_line(line) for line in lines]
+        valid = [i for i, identifier in enumerate(identifiers) if identifier]
+        results = [None] * len(lines)
+        for i, card_data in zip(valid, self.collection([identifiers[i] for i in valid])):
+            results[i] = card_data
+
+        misses = [i for i in valid if results[i] is None and 'name' in identifiers[i]]
+        if self.offline:
+            return results
+        fuzzy = self.fetch_all(
+            lambda i: self.get_json('/cards/named', params={'fuzzy': lines[i]}), misses, workers=workers
+        )
+        for i, card_data in zip(misses, fuzzy):
+            if card_data and not isinstance(card_data, Exception):
+                results[i] = card_data
+
+        return results
+
+    def fetch_all(self, func, items, workers=8):
+        """
+        Call func(item) for every item on a thread pool and return the results in order.
+        Exceptions are returned in place of results rather than raised.
+        """
+        def call(item):
+            try:
+                return func(item)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(call, items))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide Scryfall client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            cache_path = getattr(settings, 'SCRYFALL_CACHE_PATH', '')
+            cache = ResponseCache(
+                cache_path,
+                ttl=getattr(settings, 'SCRYFALL_CACHE_TTL', 86400),
+                max_entries=getattr(settings, 'SCRYFALL_CACHE_MAX_ENTRIES', 20000),
+            ) if cache_path else None
+            _client = ScryfallClient(
+                local_index=getattr(settings, 'SCRYFALL_LOCAL_INDEX', True),
+                offline=getattr(settings, 'SCRYFALL_OFFLINE', False),
+                cache=cache,
+            )
+        return _client
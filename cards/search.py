@@ -0,0 +1,213 @@
+import bisect
+import heapq
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection
+
+from .bulk_data import normalize_name
+
+# Minimum trigram similarity for a fuzzy (non-substring) match, as pg_trgm's default
+# (pg_trgm.similarity_threshold, which the `%` operator uses)
+SIMILARITY_THRESHOLD = 0.3
+
+
+def trigrams(text):
+    """Trigrams of a normalized string, padded per word the way pg_trgm does"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def match_score(query, name, similarity):
+    """
+    Rank a normalized name against a normalized query.
+
+    Exact matches beat prefixes, which beat word prefixes and substrings;
+    trigram similarity orders matches within a tier and ranks typo matches.
+    """
+    if name == query:
+        tier = 4
+    elif name.startswith(query):
+        tier = 3
+    elif f' {query}' in f' {name}':
+        tier = 2
+    elif query in name:
+        tier = 1
+    else:
+        tier = 0
+    return tier + similarity
+
+
+class CardSearchIndex:
+    """
+    In-memory trigram and prefix index over the normalized names of cube cards.
+
+    Prefix lookups bisect a sorted name list; longer queries gather candidates
+    from the trigram postings and rank them by match_score. Like the standings
+    snapshot, each worker keeps its own copy, updated as cards are added,
+    renamed or deleted and rebuilt every `refresh_interval` seconds to pick up
+    changes made by other processes.
+    """
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.names = None  # card id -> normalized name
+        self.gram_counts = {}  # card id -> number of trigrams in its name
+        self.sorted_names = []  # (normalized name, card id)
+        self.postings = defaultdict(set)  # trigram -> card ids
+        self.loaded_at = 0.0
+
+    def _load(self):
+        from .models import Card
+
+        self.names = {}
+        self.gram_counts = {}
+        self.sorted_names = []
+        self.postings = defaultdict(set)
+        for card_id, name in Card.objects.values_list('id', 'name'):
+            self._add(card_id, name)
+        self.sorted_names.sort()
+        self.loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self.names is None or time.monotonic() - self.loaded_at > self.refresh_interval:
+            self._load()
+
+    def _add(self, card_id, name, keep_sorted=False):
+        normalized = normalize_name(name)
+        self.names[card_id] = normalized
+        if keep_sorted:
+            bisect.insort(self.sorted_names, (normalized, card_id))
+        else:
+            self.sorted_names.append((normalized, card_id))
+        grams = trigrams(normalized)
+        self.gram_counts[card_id] = len(grams)
+        for gram in grams:
+            self.postings[gram].add(card_id)
+
+    def _remove(self, card_id):
+        normalized = self.names.pop(card_id, None)
+        if normalized is None:
+            return
+        del self.gram_counts[card_id]
+        position = bisect.bisect_left(self.sorted_names, (normalized, card_id))
+        if position < len(self.sorted_names) and self.sorted_names[position] == (normalized, card_id):
+            del self.sorted_names[position]
+        for gram in trigrams(normalized):
+            self.postings[gram].discard(card_id)
+
+    def update(self, card_id, name):
+        """Index a new or renamed card. No-op until the index has been built."""
+        with self.lock:
+            if self.names is None:
+                return
+            self._remove(card_id)
+            self._add(card_id, name, keep_sorted=True)
+
+    def remove(self, card_id):
+        with self.lock:
+            if self.names is not None:
+                self._remove(card_id)
+
+    def invalidate(self):
+        """Force a rebuild on next use"""
+        with self.lock:
+            self.names = None
+
+    def exact(self, name):
+        """Id of the cube card with this name (ignoring case and accents), or None"""
+        query = normalize_name(name)
+        with self.lock:
+            self._ensure_loaded()
+            position = bisect.bisect_left(self.sorted_names, (query, 0))
+            if position < len(self.sorted_names) and self.sorted_names[position][0] == query:
+                return self.sorted_names[position][1]
+        return None
+
+    def search(self, query, limit=10):
+        """
+        Best matches for a partial or misspelled card name.
+
+        Returns:
+            list: (card id, score) pairs, best first
+        """
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        with self.lock:
+            self._ensure_loaded()
+            scores = {}
+
+            # Prefix matches, which also covers queries too short for trigrams
+            position = bisect.bisect_left(self.sorted_names, (query, 0))
+            while (position < len(self.sorted_names) and self.sorted_names[position][0].startswith(query)
+                   and len(scores) < limit):
+                name, card_id = self.sorted_names[position]
+                scores[card_id] = match_score(query, name, len(query) / len(name))
+                position += 1
+
+            query_grams = trigrams(query)
+            shared = defaultdict(int)
+            for gram in query_grams:
+                for card_id in self.postings.get(gram, ()):
+                    shared[card_id] += 1
+            for card_id, count in shared.items():
+                name = self.names[card_id]
+                similarity = count / (len(query_grams) + self.gram_counts[card_id] - count)
+                if similarity >= SIMILARITY_THRESHOLD or query in name:
+                    scores[card_id] = max(scores.get(card_id, 0), match_score(query, name, similarity))
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def search_cards(query, limit=10):
+    """
+    Find cube cards by partial or misspelled name.
+
+    On PostgreSQL this uses pg_trgm: both the substring and the `%` similarity
+    filters run on UPPER(name), which the trigram index from migration 0009
+    covers, and matches are ranked in the same tiers as match_score.
+    Elsewhere it uses the in-memory index.
+
+    Returns:
+        list: card ids, best match first
+    """
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+        from django.db.models import Case, F, FloatField, Q, Value, When
+        from django.db.models.functions import Upper
+        from .models import Card
+
+        query = ' '.join(query.split()).upper()
+        if not query:
+            return []
+        tier = Case(
+            When(upper_name=query, then=Value(4.0)),
+            When(upper_name__startswith=query, then=Value(3.0)),
+            When(upper_name__contains=f' {query}', then=Value(2.0)),
+            When(upper_name__contains=query, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return list(
+            Card.objects.annotate(upper_name=Upper('name'))
+            .filter(Q(upper_name__contains=query) | Q(upper_name__trigram_similar=query))
+            .annotate(score=tier + TrigramSimilarity('upper_name', query))
+            .order_by(F('score').desc(), 'name')
+            .values_list('id', flat=True)[:limit]
+        )
+    return [card_id for card_id, _ in get_search_index().search(query, limit)]
+
+
+_search_index = CardSearchIndex()
+
+
+def get_search_index():
+    """Return the process-wide card search index"""
+    return _search_index
@@ -8,7 +8,39 @@ class CardSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class KernelCardSerializer(serializers.ModelSerializer):
+class CardThumbSerializer(serializers.ModelSerializer):
+    """Just enough to draw a card image in the kernels app"""
+    image_uri = serializers.SerializerMethodField()
+    
+    # Card columns the thumbnail is built from, for .only() projections
+    QUERY_FIELDS = ['id', 'name', 'type_line', 'image_filename', 'display']
+    
+    class Meta:
+        model = Card
+        fields = ['id', 'name', 'type_line', 'image_filename', 'image_uri']
+    
+    def get_image_uri(self, obj):
+        return (obj.display or obj.get_display_payload())['image_uri']
+
+
+# Card serializer profiles, selected with ?view=<name>
+CARD_VIEWS = {
+    'full': CardSerializer,
+    'thumb': CardThumbSerializer,
+}
+DEFAULT_CARD_VIEW = 'full'
+
+
+class NestedCardViewMixin:
+    """Serialize the nested `card` with the profile named by the `card_view` context entry"""
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['card'] = CARD_VIEWS[self.context.get('card_view', DEFAULT_CARD_VIEW)](read_only=True)
+        return fields
+
+
+class KernelCardSerializer(NestedCardViewMixin, serializers.ModelSerializer):
     card = CardSerializer(read_only=True)
     
     class Meta:
@@ -25,12 +57,15 @@ class KernelSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'order', 'cards', 'card_count', 'created_at', 'updated_at']
     
     def get_card_count(self, obj):
+        # Annotated by KernelViewSet.get_queryset; counted directly for kernels loaded elsewhere
+        if hasattr(obj, 'card_count'):
+            return obj.card_count
         return obj.cards.count()
 
 
-class CandidateCardSerializer(serializers.ModelSerializer):
+class CandidateCardSerializer(NestedCardViewMixin, serializers.ModelSerializer):
     card = CardSerializer(read_only=True)
     
     class Meta:
         model = CandidateCard
-        fields = ['id', 'card']
\ No newline at end of file
+        fields = ['id', 'card']
@@ -0,0 +1,111 @@
+import base64
+import bisect
+import json
+import threading
+import time
+
+
+def encode_cursor(key):
+    """Opaque cursor for a standings position"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back into a (-rating, rating_deviation, id) key. Raises ValueError if malformed."""
+    try:
+        neg_rating, rd, card_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (float(neg_rating), float(rd), int(card_id))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+
+class StandingsIndex:
+    """
+    Ranked snapshot of all cards, ordered by rating (desc), then RD, then id.
+
+    Each entry is a (-rating, rating_deviation, id) key, so ranks and keyset
+    positions are bisect lookups and a rating change moves a single entry
+    instead of re-sorting the pool. Like the pair sampler, each worker keeps
+    its own copy, rebuilt every `refresh_interval` seconds to pick up votes
+    applied in other processes.
+    """
+
+    def __init__(self, refresh_interval=60):
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.keys = None
+        self.key_by_id = {}
+        self.loaded_at = 0.0
+
+    def _load(self):
+        from .models import Card
+
+        rows = Card.objects.order_by('-rating', 'rating_deviation', 'id').values_list('id', 'rating', 'rating_deviation')
+        self.keys = [(-rating, rd, card_id) for card_id, rating, rd in rows]
+        self.key_by_id = {key[2]: key for key in self.keys}
+        self.loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self.keys is None or time.monotonic() - self.loaded_at > self.refresh_interval:
+            self._load()
+
+    def invalidate(self):
+        """Force a rebuild on next use"""
+        with self.lock:
+            self.keys = None
+
+    def update(self, card_id, rating, rating_deviation):
+        """Move a card to its new position. No-op until the snapshot has been built."""
+        with self.lock:
+            if self.keys is None:
+                return
+            self._remove(card_id)
+            key = (-rating, rating_deviation, card_id)
+            bisect.insort(self.keys, key)
+            self.key_by_id[card_id] = key
+
+    def remove(self, card_id):
+        with self.lock:
+            if self.keys is not None:
+                self._remove(card_id)
+
+    def _remove(self, card_id):
+        key = self.key_by_id.pop(card_id, None)
+        if key is not None:
+            position = bisect.bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                del self.keys[position]
+
+    def __len__(self):
+        with self.lock:
+            self._ensure_loaded()
+            return len(self.keys)
+
+    def page(self, after=None, limit=100):
+        """
+        Return one page of the standings.
+
+        Args:
+            after: cursor of the last entry on the previous page, or None for the top
+            limit: maximum number of entries
+
+        Returns:
+            tuple: (list of (rank, card_id), cursor for the next page or None)
+        """
+        with self.lock:
+            self._ensure_loaded()
+            start = bisect.bisect_right(self.keys, decode_cursor(after)) if after else 0
+            keys = self.keys[start:start + limit]
+            has_more = start + limit < len(self.keys)
+
+        entries = [(start + offset + 1, key[2]) for offset, key in enumerate(keys)]
+        next_cursor = encode_cursor(keys[-1]) if keys and has_more else None
+        return entries, next_cursor
+
+
+_standings = StandingsIndex()
+
+
+def get_standings():
+    """Return the process-wide standings snapshot"""
+    return _standings
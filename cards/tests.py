@@ -1,3 +1,865 @@
-from django.test import TestCase
+import base64
+import json
+import random
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .bulk_data import iter_json_array
+from .glicko2 import Glicko2
+from .glicko2_vectorized import VectorizedGlicko2
+from .import_jobs import STALE_AFTER, claim_next_job, enqueue_import, run_import_job, run_pending_jobs
+from .importer import import_card_list
+from .kernel_moves import apply_moves
+from .kernel_order import ORDER_STEP
+from .models import CandidateCard, Card, ImportJob, Kernel, KernelCard, Vote
+from .pair_pool import PairPool
+from .rating_periods import DEFAULT_RATING_DEVIATION, compute_rating_period
+from .sampler import FenwickTree, PairSampler, get_sampler, voting_weight
+from .scryfall import COLLECTION_BATCH_SIZE, ScryfallClient
+from .search import get_search_index, search_cards
+from .standings import StandingsIndex, decode_cursor, encode_cursor, get_standings
+from .vote_log import VoteLog, make_pair_token, pair_token_matches
+
+
+def create_card(name, **fields):
+    """A cube card with a unique Scryfall id derived from its name"""
+    return Card.objects.create(name=name, scryfall_id=fields.pop('scryfall_id', name), **fields)
+
+
+class FenwickTreeTests(SimpleTestCase):
+    def test_find_matches_prefix_sums(self):
+        rng = random.Random(1)
+        weights = [rng.choice([0.0, 0.5, 1.0, 3.0]) for _ in range(37)]
+        tree = FenwickTree(weights)
+        self.assertAlmostEqual(tree.total(), sum(weights))
+
+        for _ in range(500):
+            target = rng.random() * sum(weights)
+            # The first slot whose running total passes the target
+            running = 0.0
+            for expected, weight in enumerate(weights):
+                running += weight
+                if running > target:
+                    break
+            self.assertEqual(tree.find(target), expected)
+
+    def test_update(self):
+        tree = FenwickTree([1.0, 2.0, 3.0, 4.0])
+        self.assertEqual([tree.find(t) for t in (0, 0.99, 1, 2.99, 3, 6, 9.99)], [0, 0, 1, 1, 2, 3, 3])
+
+        tree.update(1, 0.0)
+        self.assertEqual(tree.total(), 8.0)
+        self.assertEqual([tree.find(t) for t in (0.99, 1, 3.99, 4)], [0, 2, 2, 3])
+
+
+class PairSamplerTests(TestCase):
+    """Pairs are drawn by RD weight, never pair a card with itself and follow card changes"""
+
+    def setUp(self):
+        random.seed(7)
+        get_sampler().invalidate()
+
+    def create_cards(self, count, rating_deviation=350.0):
+        return [create_card(f'Card {i}', rating_deviation=rating_deviation).id for i in range(count)]
+
+    def test_weight_is_positive(self):
+        self.assertEqual(voting_weight(0), 1.0)
+        self.assertEqual(voting_weight(-200), 1.0)
+        self.assertGreater(voting_weight(350), voting_weight(50))
+
+    def test_pairs_are_distinct(self):
+        for mode in PairSampler.MODES:
+            for count in (2, 5):
+                Card.objects.all().delete()
+                self.create_cards(count)
+                sampler = PairSampler(mode=mode, window=2)
+                for _ in range(300):
+                    first_id, second_id = sampler.sample_pair_ids()
+                    self.assertNotEqual(first_id, second_id)
+
+    def test_too_few_cards(self):
+        self.create_cards(1)
+        self.assertEqual(PairSampler().sample_pair_ids(), (None, None))
+
+    def test_window_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            PairSampler(mode='information', window=0)
+
+    def test_informative_opponent_falls_back_to_uniform(self):
+        card_ids = self.create_cards(3)
+        sampler = PairSampler(mode='information', window=1)
+        sampler.sample_pair_ids()
+        # A rating index that has lost every other card leaves no neighbours to weigh
+        sampler.by_rating = [(1500.0, card_ids[0])]
+        for _ in range(50):
+            self.assertIn(sampler._draw_informative_opponent(card_ids[0]), card_ids[1:])
+
+    def test_update_changes_distribution(self):
+        card_ids = self.create_cards(4, rating_deviation=0)
+        sampler = PairSampler()
+        sampler.sample_pair_ids()
+
+        # Weight 10 against three cards of weight 1
+        sampler.update(card_ids[0], 1500, 900)
+        draws = [sampler.sample_pair_ids() for _ in range(2000)]
+        share = sum(card_ids[0] in pair for pair in draws) / len(draws)
+        self.assertGreater(share, 0.9)
+
+        sampler.update(card_ids[0], 1500, 0)
+        draws = [sampler.sample_pair_ids() for _ in range(2000)]
+        share = sum(card_ids[0] in pair for pair in draws) / len(draws)
+        self.assertLess(share, 0.6)  # 0.5 for four equal weights
+
+    def test_card_save_and_delete_update_sampler(self):
+        card_ids = self.create_cards(3)
+        sampler = get_sampler()
+        self.assertEqual(len(sampler), 3)
+
+        new_card = create_card('New')
+        self.assertIn(new_card.id, sampler)
+
+        Card.objects.get(id=card_ids[0]).delete()
+        self.assertNotIn(card_ids[0], sampler)
+        for _ in range(200):
+            self.assertNotIn(card_ids[0], sampler.sample_pair_ids())
+
+
+class VoteLogTests(TestCase):
+    """Votes are buffered until the batch fills, max_delay passes or the process exits"""
+
+    def setUp(self):
+        self.winner = create_card('Winner')
+        self.loser = create_card('Loser')
+
+    def test_flush_when_batch_is_full(self):
+        log = VoteLog(batch_size=3, max_delay=60)
+        log.append(self.winner.id, self.loser.id)
+        log.append(self.winner.id, self.loser.id)
+        self.assertEqual(Vote.objects.count(), 0)
+
+        log.append(self.winner.id, self.loser.id, applied=False)
+        self.assertEqual(Vote.objects.count(), 3)
+        self.assertEqual(Vote.objects.filter(applied=False).count(), 1)
+        self.assertIsNone(log.timer)
+
+    def test_flush_after_max_delay(self):
+        log = VoteLog(batch_size=10, max_delay=0.05)
+        with mock.patch.object(log, '_write') as write:
+            log.append(self.winner.id, self.loser.id)
+            write.assert_not_called()
+
+            deadline = time.monotonic() + 2
+            while not write.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        write.assert_called_once()
+        self.assertEqual(len(write.call_args.args[0]), 1)
+        self.assertEqual(log.buffer, [])
+
+    def test_flush_at_exit(self):
+        with mock.patch('cards.vote_log.atexit.register') as register:
+            log = VoteLog(batch_size=10, max_delay=60)
+        register.assert_called_once_with(log.flush)
+
+        log.append(self.winner.id, self.loser.id)
+        log.flush()
+        self.assertEqual(Vote.objects.count(), 1)
+
+    def test_pair_tokens(self):
+        token = make_pair_token(self.winner.id, self.loser.id)
+        self.assertTrue(pair_token_matches(token, self.loser.id, self.winner.id))
+        self.assertFalse(pair_token_matches(token, self.winner.id, self.winner.id))
+        self.assertFalse(pair_token_matches(token + 'x', self.winner.id, self.loser.id))
+        self.assertFalse(pair_token_matches(token, 'x', self.loser.id))
+
+        response = self.client.post('/vote/', json.dumps(
+            {'winner_id': 'x', 'loser_id': self.loser.id, 'pair_token': token}
+        ), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(VOTE_QUEUE=True)
+class QueuedVoteTests(TestCase):
+    """In queued mode a vote is only logged; process_votes applies it later"""
+
+    def setUp(self):
+        self.winner = create_card('Winner')
+        self.loser = create_card('Loser')
+        # Keep the pair pool's refill thread out of the test database
+        patcher = mock.patch('cards.views.get_pair_pool')
+        patcher.start().return_value.pop.return_value = None
+        self.addCleanup(patcher.stop)
+
+    def post_vote(self, winner_id, loser_id):
+        return self.client.post('/vote/', json.dumps({'winner_id': winner_id, 'loser_id': loser_id}),
+                                content_type='application/json')
+
+    def test_vote_is_logged_unapplied(self):
+        response = self.post_vote(self.winner.id, self.loser.id)
+
+        self.assertEqual(response.status_code, 200)
+        vote = Vote.objects.get()
+        self.assertEqual((vote.winner_id, vote.loser_id, vote.applied), (self.winner.id, self.loser.id, False))
+        for card in Card.objects.all():
+            self.assertEqual((card.rating, card.rating_deviation), (1500.0, 350.0))
+
+    def test_card_created_elsewhere_is_accepted(self):
+        # A card this process's sampler hasn't loaded yet
+        get_sampler().sample_pair_ids()
+        Card.objects.bulk_create([Card(name='Imported', scryfall_id='imported')])
+        imported = Card.objects.get(name='Imported')
+
+        self.assertEqual(self.post_vote(imported.id, self.loser.id).status_code, 200)
+
+    def test_bad_ids(self):
+        self.assertEqual(self.post_vote('x', self.loser.id).status_code, 400)
+        self.assertEqual(self.post_vote(999, self.loser.id).status_code, 404)
+        self.assertFalse(Vote.objects.exists())
+
+
+class PairPoolTests(TestCase):
+    def setUp(self):
+        create_card('First')
+        create_card('Second')
+
+    def test_size_zero_samples_on_demand(self):
+        pool = PairPool(size=0, low_water=10)
+        with mock.patch('cards.pair_pool.threading.Thread') as thread:
+            pair = pool.pop()
+        thread.assert_not_called()
+        self.assertEqual({pair['card1']['name'], pair['card2']['name']}, {'First', 'Second'})
+
+    def test_invalidate_drops_pairs_with_card(self):
+        pool = PairPool(size=5, low_water=0)
+        pair = PairPool.sample()
+        pool.pairs.append((time.monotonic(), pair))
+        pool.invalidate(pair['card2']['id'])
+        self.assertEqual(len(pool.pairs), 0)
+
+
+class StandingsTests(TestCase):
+    """Standings rank by rating, then RD, then id, and page by keyset cursors"""
+
+    def setUp(self):
+        get_standings().invalidate()
+        # Two ties on rating, one of them also tied on RD
+        self.cards = [
+            create_card(name, rating=rating, rating_deviation=rd)
+            for name, rating, rd in [
+                ('a', 1600, 100), ('b', 1700, 80), ('c', 1600, 50), ('d', 1500, 60), ('e', 1600, 50),
+            ]
+        ]
+        self.expected = ['b', 'c', 'e', 'a', 'd']
+
+    def walk(self, index, limit):
+        names = {card.id: card.name for card in self.cards}
+        entries, cursor = index.page(limit=limit)
+        pages = [entries]
+        while cursor:
+            self.assertEqual(decode_cursor(encode_cursor(decode_cursor(cursor))), decode_cursor(cursor))
+            entries, cursor = index.page(after=cursor, limit=limit)
+            pages.append(entries)
+        return [[(rank, names[card_id]) for rank, card_id in page] for page in pages]
+
+    def test_pages_follow_tie_order(self):
+        for limit in (1, 2, 5, 10):
+            pages = self.walk(StandingsIndex(), limit)
+            self.assertEqual([entry for page in pages for entry in page], list(enumerate(self.expected, 1)))
+            self.assertTrue(all(len(page) <= limit for page in pages))
+
+    def test_invalid_cursor(self):
+        for cursor in ('nope', encode_cursor([1, 2]), encode_cursor({'a': 1}), encode_cursor(['x', 1, 2])):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+        response = self.client.get('/standings/data/', {'after': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_card_save_and_delete_update_index(self):
+        index = get_standings()
+        self.assertEqual(len(index), 5)
+
+        d = self.cards[3]
+        d.rating = 1800
+        d.save(update_fields=['rating'])
+        self.assertEqual([name for _, name in self.walk(index, 10)[0]][:2], ['d', 'b'])
+
+        self.cards[1].delete()
+        self.assertEqual([name for _, name in self.walk(index, 10)[0]], ['d', 'c', 'e', 'a'])
+
+    def test_standings_data_pages(self):
+        first = self.client.get('/standings/data/', {'limit': 3}).json()
+        second = self.client.get('/standings/data/', {'limit': 3, 'after': first['next']}).json()
+
+        self.assertEqual([row['name'] for row in first['results'] + second['results']], self.expected)
+        self.assertEqual([row['rank'] for row in second['results']], [4, 5])
+        self.assertIsNone(second['next'])
+
+
+class IterJsonArrayTests(SimpleTestCase):
+    """The streaming bulk-file parser must agree with json.loads however the text is chunked"""
+
+    document = json.dumps([
+        {'name': 'Fire // Ice', 'oracle_text': 'Split ] card, with [brackets] and "quotes"', 'cmc': 4.0},
+        {'name': 'Lotus', 'image_uris': {'normal': 'https://example.com/a,b]'}, 'keywords': []},
+        1.5, -12345, 2e-3, True, None, 'a string, with ] in it', [], {},
+    ], indent=2)
+
+    def chunked(self, text, sizes):
+        position = 0
+        for size in sizes:
+            if position >= len(text):
+                return
+            yield text[position:position + size]
+            position += size
+        yield text[position:]
+
+    def test_one_character_chunks(self):
+        self.assertEqual(list(iter_json_array(self.document)), json.loads(self.document))
+
+    def test_random_chunks(self):
+        rng = random.Random(13)
+        for _ in range(50):
+            sizes = [rng.randint(1, 20) for _ in range(len(self.document))]
+            self.assertEqual(list(iter_json_array(self.chunked(self.document, sizes))), json.loads(self.document))
+
+    def test_empty_and_truncated(self):
+        self.assertEqual(list(iter_json_array(' [ ] ')), [])
+        for text in ('[1.5, 12', '[{"a": 1}', '[1.]'):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(text))
+
+
+class ImportCardListTests(TestCase):
+    """Pasted lists are resolved in collection batches, deduplicated and inserted in bulk"""
+
+    def setUp(self):
+        self.known = {}  # lowercased name -> Scryfall card data
+        self.batches = []
+        client = ScryfallClient(local_index=False, cache=None)
+        client.post_json = self.fake_collection
+        client.get_json = self.fake_named
+        patcher = mock.patch('cards.importer.get_client', return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_known(self, *names):
+        for name in names:
+            self.known[name.lower()] = {
+                'id': f'sf-{name}', 'name': name, 'layout': 'normal', 'type_line': 'Instant', 'cmc': 1,
+                'color_identity': ['R'], 'image_uris': {'normal': f'https://example.com/{name}.jpg'},
+            }
+
+    def fake_collection(self, path, payload):
+        identifiers = payload['identifiers']
+        self.batches.append(len(identifiers))
+        found = [self.known[identifier['name'].lower()] for identifier in identifiers
+                 if identifier.get('name', '').lower() in self.known]
+        return {'data': found}
+
+    def fake_named(self, path, params=None):
+        # Fuzzy matching: any known name containing the query
+        return next((card for name, card in self.known.items() if params['fuzzy'].lower() in name), None)
+
+    def test_batches_of_75(self):
+        names = [f'Card {i}' for i in range(2 * COLLECTION_BATCH_SIZE + 10)]
+        self.add_known(*names)
+
+        results = import_card_list(names)
+
+        self.assertEqual(self.batches, [COLLECTION_BATCH_SIZE, COLLECTION_BATCH_SIZE, 10])
+        self.assertEqual((results['added'], results['existed'], results['errors']), (len(names), 0, 0))
+        self.assertEqual(Card.objects.count(), len(names))
+
+    def test_duplicates_count_as_existing(self):
+        self.add_known('Lightning Bolt', 'Counterspell', 'Opt')
+        create_card('Opt', scryfall_id='sf-Opt')
+
+        results = import_card_list(['Lightning Bolt', 'lightning bolt', 'Counterspell', 'Opt', 'bolt'])
+
+        self.assertEqual((results['total'], results['added'], results['existed'], results['errors']), (5, 2, 3, 0))
+        self.assertEqual(sorted(Card.objects.values_list('name', flat=True)), ['Counterspell', 'Lightning Bolt', 'Opt'])
+
+    def test_unresolved_lines(self):
+        self.add_known('Opt')
+
+        results = import_card_list(['Opt', 'No Such Card', 'https://scryfall.com/not-a-card'])
+
+        self.assertEqual((results['added'], results['errors']), (1, 2))
+        self.assertEqual(results['error_details'], [
+            'Card not found: No Such Card', 'Card not found: https://scryfall.com/not-a-card',
+        ])
+
+
+class ImportJobTests(TestCase):
+    """Queued bulk imports are claimed once, resumed if abandoned, and run inline unless a worker is enabled"""
+
+    def setUp(self):
+        self.chunks = []
+        patcher = mock.patch('cards.import_jobs.import_card_list', side_effect=self.fake_import)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_import(self, lines):
+        self.chunks.append(list(lines))
+        return {'total': len(lines), 'added': len(lines), 'existed': 0, 'errors': 0, 'error_details': []}
+
+    def test_enqueue_import(self):
+        job = enqueue_import(['Opt', 'Counterspell'])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.PENDING)
+        self.assertEqual((job.lines, job.total, job.processed), (['Opt', 'Counterspell'], 2, 0))
+        self.assertEqual(self.chunks, [])
+
+    def test_stale_job_resumes_where_it_stopped(self):
+        job = enqueue_import(['a', 'b', 'c', 'd', 'e'])
+        ImportJob.objects.filter(id=job.id).update(
+            status=ImportJob.RUNNING, processed=2, added=2,
+            updated_at=timezone.now() - STALE_AFTER - timedelta(minutes=1),
+        )
+
+        claimed = claim_next_job()
+        self.assertEqual(claimed.id, job.id)
+        finished = run_import_job(claimed, chunk_size=2)
+
+        self.assertEqual(self.chunks, [['c', 'd'], ['e']])
+        self.assertEqual(finished.status, ImportJob.DONE)
+        self.assertEqual((finished.processed, finished.added), (5, 5))
+
+    def test_running_job_is_not_claimed_by_another_worker(self):
+        job = enqueue_import(['a'])
+        self.assertEqual(claim_next_job().id, job.id)
+        self.assertIsNone(claim_next_job())
+
+    def test_finished_job_is_not_picked_up_again(self):
+        enqueue_import(['a', 'b'])
+
+        self.assertEqual(run_pending_jobs(), 1)
+        self.assertEqual(run_pending_jobs(), 0)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(self.chunks, [['a', 'b']])
+
+    def test_bulk_add_runs_inline_by_default(self):
+        response = self.client.post('/bulk-add-cards/', {'card_list': 'Opt\nCounterspell'}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['status'], response.json()['added']), (ImportJob.DONE, 2))
+
+    @override_settings(BACKGROUND_IMPORTS=True)
+    def test_bulk_add_queues_for_the_worker(self):
+        response = self.client.post('/bulk-add-cards/', {'card_list': 'Opt\nCounterspell'}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], ImportJob.PENDING)
+        self.assertEqual(self.chunks, [])
+
+
+class CardSearchIndexTests(TestCase):
+    """The in-memory name index matches partial, accented and misspelled names and follows card changes"""
+
+    def setUp(self):
+        self.index = get_search_index()
+        self.index.invalidate()
+        self.addCleanup(self.index.invalidate)
+
+    def names(self, query, limit=10):
+        names = dict(Card.objects.values_list('id', 'name'))
+        return [names[card_id] for card_id in search_cards(query, limit)]
+
+    def test_matching(self):
+        bolt = create_card('Lightning Bolt')
+        for name in ['Lightning Helix', 'Chain Lightning', 'Counterspell', 'Jötun Grunt']:
+            create_card(name)
+
+        self.assertCountEqual(self.names('lightning'), ['Lightning Bolt', 'Lightning Helix', 'Chain Lightning'])
+        self.assertEqual(self.names('li', limit=1), ['Lightning Bolt'])
+        self.assertEqual(self.names('jotun'), ['Jötun Grunt'])
+        self.assertEqual(self.names('lightnig bolt')[0], 'Lightning Bolt')
+        self.assertEqual(self.names('zzz'), [])
+        self.assertEqual(self.index.exact('  lightning   BOLT '), bolt.id)
+        self.assertIsNone(self.index.exact('Lightning'))
+
+    def test_ranking(self):
+        for name in ['Thunderbolt', 'Lightning Bolt', 'Bolt Bend', 'Bolt']:
+            create_card(name)
+
+        # Exact, then prefix, then word prefix, then substring
+        self.assertEqual(self.names('bolt'), ['Bolt', 'Bolt Bend', 'Lightning Bolt', 'Thunderbolt'])
+
+    def test_follows_card_save_and_delete(self):
+        card = create_card('Opt')
+        self.assertEqual(self.names('opt'), ['Opt'])
+
+        create_card('Optimus')
+        self.assertEqual(self.names('opt'), ['Opt', 'Optimus'])
+
+        card.name = 'Counterspell'
+        card.save()
+        self.assertEqual(self.names('opt'), ['Optimus'])
+        self.assertEqual(self.names('counter'), ['Counterspell'])
+
+        card.delete()
+        self.assertEqual(self.names('counter'), [])
+        self.assertIsNone(self.index.exact('Counterspell'))
+
+    def test_diagnostics_uses_the_index(self):
+        create_card('Lightning Bolt')
+        create_card('Counterspell')
+
+        response = self.client.get('/diagnostics/', {'search': 'lightnig bolt'})
+
+        self.assertEqual([card.name for card in response.context['cards']], ['Lightning Bolt'])
+
+
+class CandidatePaginationTests(TestCase):
+    """Candidate pages follow a keyset cursor that handles ties on every sort column"""
+
+    COLOR_IDENTITIES = [[], ['W'], ['U'], ['W', 'U'], ['U', 'W'], ['R', 'G']]
+
+    def setUp(self):
+        self.client = APIClient()
+        rng = random.Random(5)
+        for i in range(60):
+            card = create_card(
+                f'Card {rng.randrange(1000):03d}-{i}',
+                color_identity=rng.choice(self.COLOR_IDENTITIES),
+                cmc=rng.choice([1, 2, 2.5]),
+                type_line=rng.choice(['Creature - Elf', 'Instant', 'Legendary Creature - Elf']),
+            )
+            CandidateCard.objects.create(card=card)
+        kernel = Kernel.objects.create(name='Kernel', order=ORDER_STEP)
+        KernelCard.objects.create(kernel=kernel, card=create_card('In a kernel'))
+
+    def expected(self, **filters):
+        return list(
+            CandidateCard.objects.filter(card__kernelcard__isnull=True, **filters)
+            .order_by('card__num_colors', 'card__color_sort_key', 'card__cmc', 'card__name')
+            .values_list('id', flat=True)
+        )
+
+    def walk(self, **params):
+        """Candidate ids across every page, following the next links"""
+        response = self.client.get('/api/candidates/', {'limit': 7, **params})
+        self.assertEqual(response.status_code, 200)
+        count = response.json()['count']
+        ids = []
+        while True:
+            page = response.json()
+            ids.extend(candidate['id'] for candidate in page['results'])
+            if not page['next']:
+                break
+            response = self.client.get(page['next'])
+            self.assertIsNone(response.json()['count'])
+        self.assertEqual(count, len(ids))
+        return ids
+
+    def test_walk_has_no_duplicates_or_gaps(self):
+        ids = self.walk()
+
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids, self.expected())
+        self.assertEqual(len(ids), 60)
+
+    def test_filters(self):
+        self.assertEqual(self.walk(color_identity='wu'), self.expected(
+            card__num_colors=2, card__color_identity__icontains='"W"'))
+        self.assertEqual(self.walk(color_identity='C'), self.expected(card__num_colors=0))
+        self.assertEqual(self.walk(cmc='2.5'), self.expected(card__cmc=2.5))
+        self.assertEqual(self.walk(cmc_min='2', cmc_max='2'), self.expected(card__cmc=2))
+        self.assertEqual(self.walk(type='legendary'), self.expected(card__type_line__startswith='Legendary'))
+        self.assertEqual(self.walk(type='creature', color_identity='RG'), self.expected(
+            card__type_line__contains='Creature', card__color_identity__icontains='"R"'))
+
+    def test_invalid_filters(self):
+        self.assertEqual(self.client.get('/api/candidates/', {'color_identity': 'X'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/candidates/', {'cmc_min': 'two'}).status_code, 400)
+
+    def test_bad_cursor(self):
+        def encode(values):
+            return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+        for cursor in ['not base64!', encode({'num_colors': 1}), encode([1, '1_W', 2]),
+                       encode([1, '1_W', 2, ['Card']]), encode([1, {'a': 1}, 2, 'Card']), encode([True, '1_W', 2, 'Card'])]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/candidates/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.json())
+
+
+class VectorizedGlicko2Tests(SimpleTestCase):
+    """The NumPy rating period must agree with the scalar Glicko2 reference"""
+
+    def random_period(self, card_count=2000, game_count=5000, seed=4):
+        rng = random.Random(seed)
+        ratings = {
+            card_id: (rng.uniform(1000, 2000), rng.uniform(30, 350), rng.uniform(0.04, 0.09))
+            for card_id in range(card_count)
+        }
+        matches = [tuple(rng.sample(range(card_count), 2)) for _ in range(game_count)]
+        return ratings, matches
+
+    def test_rate_period_matches_compute_rating_period(self):
+        ratings, matches = self.random_period()
+        expected = compute_rating_period(ratings, matches, decay_inactive=True)
+
+        columns = np.array([ratings[card_id] for card_id in range(len(ratings))]).T
+        winners, losers = np.array(matches).T
+        new_ratings, new_rds, new_vols = VectorizedGlicko2.rate_period(
+            *columns, winners, losers, max_inactive_rd=DEFAULT_RATING_DEVIATION
+        )
+
+        for card_id, (rating, rd, vol) in expected.items():
+            self.assertAlmostEqual(new_ratings[card_id], rating, delta=1e-10 * abs(rating))
+            self.assertAlmostEqual(new_rds[card_id], rd, delta=1e-10 * rd)
+            self.assertAlmostEqual(new_vols[card_id], vol, delta=1e-10 * vol)
+
+    def test_update_period_matches_update_single_player(self):
+        ratings, matches = self.random_period(card_count=50, game_count=200)
+        mu = np.array([Glicko2.scale_down(ratings[i][0]) for i in range(len(ratings))])
+        phi = np.array([Glicko2.scale_rd_down(ratings[i][1]) for i in range(len(ratings))])
+        sigma = np.array([ratings[i][2] for i in range(len(ratings))])
+        winners, losers = np.array(matches).T
+
+        new_mu, new_phi, new_sigma = VectorizedGlicko2.update_period(
+            mu, phi, sigma, *VectorizedGlicko2.match_matrix(winners, losers)
+        )
+
+        for player in range(len(ratings)):
+            results = [(mu[loser], phi[loser], 1.0) for winner, loser in matches if winner == player]
+            results += [(mu[winner], phi[winner], 0.0) for winner, loser in matches if loser == player]
+            expected = Glicko2._update_single_player(mu[player], phi[player], sigma[player], results)
+            np.testing.assert_allclose((new_mu[player], new_phi[player], new_sigma[player]), expected,
+                                       rtol=1e-10, atol=1e-12)
+
+
+class KernelTestCase(TestCase):
+    """API client plus a factory for numbered kernels (and their cards) in list order"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_kernels(self, kernel_count, cards_per_kernel=0):
+        """Create 'Kernel k' (holding 'Card k-c' cards) after the existing kernels; returns their ids"""
+        start = Kernel.objects.count()
+        ids = []
+        for k in range(start, start + kernel_count):
+            kernel = Kernel.objects.create(name=f'Kernel {k}', order=(k + 1) * ORDER_STEP)
+            for c in range(cards_per_kernel):
+                card = Card.objects.create(name=f'Card {k}-{c}', scryfall_id=f'{k}-{c}')
+                KernelCard.objects.create(kernel=kernel, card=card)
+            ids.append(kernel.id)
+        return ids
+
+    def names(self):
+        return [kernel['name'] for kernel in self.client.get('/api/kernels/').json()]
+
+
+class KernelListQueryCountTests(KernelTestCase):
+    """Listing kernels must not issue queries per kernel or per card"""
+
+    def test_list_is_constant_queries(self):
+        self.create_kernels(2, 2)
+        with self.assertNumQueries(2):
+            small = self.client.get('/api/kernels/')
+
+        self.create_kernels(8, 5)
+        with self.assertNumQueries(2):
+            large = self.client.get('/api/kernels/')
+
+        self.assertEqual(len(small.json()), 2)
+        self.assertEqual(len(large.json()), 10)
+
+    def test_card_count_and_cards(self):
+        self.create_kernels(1, 3)
+        self.create_kernels(1)
+
+        kernels = self.client.get('/api/kernels/').json()
+
+        self.assertEqual([kernel['card_count'] for kernel in kernels], [3, 0])
+        self.assertEqual(
+            [kernel_card['card']['name'] for kernel_card in kernels[0]['cards']],
+            ['Card 0-0', 'Card 0-1', 'Card 0-2'],
+        )
+
+    def test_kernels_in_order(self):
+        for name, order in [('b', 1), ('a', 2), ('c', 0)]:
+            Kernel.objects.create(name=name, order=order)
+
+        kernels = self.client.get('/api/kernels/').json()
+
+        self.assertEqual([kernel['name'] for kernel in kernels], ['c', 'b', 'a'])
+
+
+class KernelOrderTests(KernelTestCase):
+    """Reordering kernels is a fixed number of queries, and a single move rewrites one row"""
+
+    def test_created_kernels_go_last(self):
+        self.create_kernels(2)
+        self.client.post('/api/kernels/', {'name': 'New'}, format='json')
+        self.assertEqual(self.names(), ['Kernel 0', 'Kernel 1', 'New'])
+
+    def test_reorder_is_constant_queries(self):
+        small = self.create_kernels(3)
+        with self.assertNumQueries(4):  # savepoint, validate, bulk_update, release
+            self.client.post('/api/kernels/reorder/', {'kernel_ids': small[::-1]}, format='json')
+
+        large = small + self.create_kernels(20)
+        with self.assertNumQueries(4):
+            self.client.post('/api/kernels/reorder/', {'kernel_ids': large[::-1]}, format='json')
+
+        self.assertEqual(self.names(), [f'Kernel {k}' for k in reversed(range(23))])
+
+    def test_reorder_unknown_kernel(self):
+        ids = self.create_kernels(2)
+        response = self.client.post('/api/kernels/reorder/', {'kernel_ids': ids + [999]}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.names(), ['Kernel 0', 'Kernel 1'])
+
+    def test_move_rewrites_one_row(self):
+        ids = self.create_kernels(4)
+        with self.assertNumQueries(4):  # savepoint, read orders, update one row, release
+            self.client.post(f'/api/kernels/{ids[3]}/move/', {'after_id': ids[0]}, format='json')
+        self.assertEqual(self.names(), ['Kernel 0', 'Kernel 3', 'Kernel 1', 'Kernel 2'])
+
+        self.client.post(f'/api/kernels/{ids[2]}/move/', {'after_id': None}, format='json')
+        self.assertEqual(self.names(), ['Kernel 2', 'Kernel 0', 'Kernel 3', 'Kernel 1'])
+
+    def test_move_respaces_when_gap_is_used_up(self):
+        ids = self.create_kernels(3)
+        # Keep moving the last kernel between the first two until their gap runs out
+        for _ in range(12):
+            last = self.client.get('/api/kernels/').json()[-1]['id']
+            self.client.post(f'/api/kernels/{last}/move/', {'after_id': ids[0]}, format='json')
+
+        orders = [kernel['order'] for kernel in self.client.get('/api/kernels/').json()]
+        self.assertEqual(len(set(orders)), 3)
+        self.assertEqual(orders, sorted(orders))
+        self.assertEqual(self.names()[0], 'Kernel 0')
+
+
+class KernelCardMoveTests(KernelTestCase):
+    """Cards move between kernels and the candidates in set-based batches"""
+
+    def create_candidates(self, count):
+        start = Card.objects.count()
+        cards = [Card.objects.create(name=f'Candidate {i}', scryfall_id=f'candidate-{i}')
+                 for i in range(start, start + count)]
+        CandidateCard.objects.bulk_create([CandidateCard(card=card) for card in cards])
+        return [card.id for card in cards]
+
+    def placement(self, card_id):
+        """The kernel holding a card, 'candidate', or None if it is in neither"""
+        kernel_ids = list(KernelCard.objects.filter(card_id=card_id).values_list('kernel_id', flat=True))
+        if CandidateCard.objects.filter(card_id=card_id).exists():
+            kernel_ids.append('candidate')
+        self.assertLessEqual(len(kernel_ids), 1)
+        return kernel_ids[0] if kernel_ids else None
+
+    def move_cards(self, moves):
+        return self.client.post('/api/kernels/move_cards/', {'moves': moves}, format='json')
+
+    def test_apply_moves(self):
+        first, second = self.create_kernels(2)
+        a, b, c = self.create_candidates(3)
+
+        self.assertEqual(apply_moves([(a, first), (b, first), (c, first)]), 3)
+        # b goes to the other kernel, c back to the candidates, a stays (and doesn't count)
+        self.assertEqual(apply_moves([(a, first), (b, second), (c, None)]), 2)
+        self.assertEqual([self.placement(card_id) for card_id in (a, b, c)], [first, second, 'candidate'])
+
+        # The last move of a card wins
+        apply_moves([(a, second), (a, None)])
+        self.assertEqual(self.placement(a), 'candidate')
+        self.assertEqual(apply_moves([]), 0)
+
+    def test_apply_moves_unknown_ids_write_nothing(self):
+        kernel, = self.create_kernels(1)
+        card, = self.create_candidates(1)
+
+        with self.assertRaises(Card.DoesNotExist):
+            apply_moves([(card, kernel), (999, kernel)])
+        with self.assertRaises(Kernel.DoesNotExist):
+            apply_moves([(card, 999)])
+        self.assertEqual(self.placement(card), 'candidate')
+
+    def test_move_cards_is_constant_queries(self):
+        kernel, = self.create_kernels(1)
+        small = self.create_candidates(3)
+        large = self.create_candidates(30)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            response = self.move_cards([{'card_id': card_id, 'kernel_id': kernel} for card_id in small])
+        self.assertEqual(response.json(), {'success': True, 'moved': 3})
+        with CaptureQueriesContext(connection) as large_queries:
+            response = self.move_cards([{'card_id': card_id, 'kernel_id': kernel} for card_id in large])
+        self.assertEqual(response.json(), {'success': True, 'moved': 30})
+
+        self.assertEqual(len(large_queries), len(small_queries))
+        self.assertEqual(KernelCard.objects.filter(kernel_id=kernel).count(), 33)
+        self.assertFalse(CandidateCard.objects.exists())
+
+    def test_move_cards_errors(self):
+        kernel, = self.create_kernels(1)
+        card, = self.create_candidates(1)
+
+        self.assertEqual(self.client.post('/api/kernels/move_cards/', {}, format='json').status_code, 400)
+        self.assertEqual(self.move_cards([{'kernel_id': kernel}]).status_code, 400)
+        self.assertEqual(self.move_cards([{'card_id': 'x', 'kernel_id': kernel}]).status_code, 400)
+        self.assertEqual(self.move_cards([{'card_id': card, 'kernel_id': 999}]).status_code, 404)
+        self.assertEqual(self.placement(card), 'candidate')
+
+    def test_add_card(self):
+        first, second = self.create_kernels(2)
+        card, = self.create_candidates(1)
+
+        response = self.client.post(f'/api/kernels/{first}/add_card/', {'card_id': card}, format='json')
+        self.assertEqual(response.json(), {'success': True, 'created': True})
+        response = self.client.post(f'/api/kernels/{first}/add_card/', {'card_id': card}, format='json')
+        self.assertEqual(response.json(), {'success': True, 'created': False})
+        self.client.post(f'/api/kernels/{second}/add_card/', {'card_id': card}, format='json')
+        self.assertEqual(self.placement(card), second)
+
+        response = self.client.post('/api/kernels/999/add_card/', {'card_id': card}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_remove_card_only_from_its_kernel(self):
+        first, second = self.create_kernels(2)
+        card, = self.create_candidates(1)
+        apply_moves([(card, first)])
+
+        response = self.client.post(f'/api/kernels/{second}/remove_card/', {'card_id': card}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.placement(card), first)
+
+        response = self.client.post('/api/kernels/999/remove_card/', {'card_id': card}, format='json')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(f'/api/kernels/{first}/remove_card/', {'card_id': 999}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.placement(card), first)
+
+        self.client.post(f'/api/kernels/{first}/remove_card/', {'card_id': card}, format='json')
+        self.assertEqual(self.placement(card), 'candidate')
+
+    def test_move_to_kernel(self):
+        first, second = self.create_kernels(2)
+        card, = self.create_candidates(1)
+
+        for kernel in (first, second):
+            response = self.client.post(
+                '/api/candidates/move_to_kernel/', {'card_id': card, 'kernel_id': kernel}, format='json'
+            )
+            self.assertEqual(response.json(), {'success': True})
+            self.assertEqual(self.placement(card), kernel)
+
+        response = self.client.post(
+            '/api/candidates/move_to_kernel/', {'card_id': card, 'kernel_id': 999}, format='json'
+        )
+        self.assertEqual(response.status_code, 404)
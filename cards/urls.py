@@ -11,7 +11,10 @@ urlpatterns = [
     path('search-card/', views.search_card, name='search_card'),
     path('add-card/', views.add_card, name='add_card'),
     path('bulk-add-cards/', views.bulk_add_cards, name='bulk_add_cards'),
+    path('import-jobs/<int:job_id>/', views.import_job_status, name='import_job_status'),
     path('standings/', views.standings, name='standings'),
+    path('standings/data/', views.standings_data, name='standings_data'),
+    path('typeahead/', views.card_typeahead, name='card_typeahead'),
     path('diagnostics/', views.diagnostics, name='diagnostics'),
     path('update-card/', views.update_card, name='update_card'),
     path('delete-card/', views.delete_card, name='delete_card'),
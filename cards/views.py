@@ -1,13 +1,28 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
 from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-import requests
 import json
-from .models import Card
+from .import_jobs import enqueue_import, run_import_job
+from .models import Card, ImportJob
+from .page_cache import CARDS, STANDINGS, cache_page_until_write
+from .pair_pool import get_pair_pool
+from .scryfall import get_client, parse_card_url
+from .search import get_search_index, search_cards
+from .standings import get_standings
+from .vote_log import get_vote_log, pair_token_matches
 
 
+def get_voter_key(request):
+    """Session key identifying the voter, creating a session if needed"""
+    if not request.session.session_key:
+        request.session.create()
+    return request.session.session_key
+
+
+@cache_page_until_write(CARDS)
 def landing_page(request):
     """Landing page with navigation to other sections"""
     total_cards = Card.objects.count()
@@ -19,20 +34,16 @@ def landing_page(request):
 
 def head_to_head(request):
     """Head-to-head voting page"""
-    card1, card2 = Card.get_random_pair_for_voting()
+    pair = get_pair_pool().pop()
     
-    if not card1 or not card2:
+    if not pair:
         # Not enough cards for voting
         context = {
             'error': 'Need at least 2 cards in the database to start voting.'
         }
         return render(request, 'cards/head_to_head.html', context)
     
-    context = {
-        'card1': card1,
-        'card2': card2
-    }
-    return render(request, 'cards/head_to_head.html', context)
+    return render(request, 'cards/head_to_head.html', pair)
 
 
 @csrf_exempt
@@ -43,42 +54,39 @@ def vote(request):
         data = json.loads(request.body)
         winner_id = data.get('winner_id')
         loser_id = data.get('loser_id')
+        pair_token = data.get('pair_token', '')
         
         if not winner_id or not loser_id:
             return JsonResponse({'error': 'Missing winner_id or loser_id'}, status=400)
         
-        winner_card = get_object_or_404(Card, id=winner_id)
-        loser_card = get_object_or_404(Card, id=loser_id)
+        if pair_token and not pair_token_matches(pair_token, winner_id, loser_id):
+            return JsonResponse({'error': 'Vote does not match the pair that was served'}, status=400)
         
-        # Update ratings
-        Card.update_ratings_after_vote(winner_card, loser_card)
+        if settings.VOTE_QUEUE:
+            # Queued mode: just record the vote, a process_votes worker applies it to the ratings
+            try:
+                winner_id = int(winner_id)
+                loser_id = int(loser_id)
+            except (TypeError, ValueError):
+                return JsonResponse({'error': 'winner_id and loser_id must be card ids'}, status=400)
+            # Check the database rather than this process's sampler, which may not have seen new cards yet
+            card_ids = {winner_id, loser_id}
+            if Card.objects.filter(id__in=card_ids).count() != len(card_ids):
+                return JsonResponse({'error': 'Card not found'}, status=404)
+            get_vote_log().append(winner_id, loser_id, get_voter_key(request), pair_token, applied=False)
+        else:
+            # Only the ids are needed; update_ratings_after_vote re-reads the ratings under a lock
+            winner_card = get_object_or_404(Card.objects.only('id'), id=winner_id)
+            loser_card = get_object_or_404(Card.objects.only('id'), id=loser_id)
+            
+            # Update ratings
+            Card.update_ratings_after_vote(winner_card, loser_card)
+            
+            # Record the match so ratings can be audited and replayed
+            get_vote_log().append(winner_card.id, loser_card.id, get_voter_key(request), pair_token)
         
         # Get new pair for next vote
-        card1, card2 = Card.get_random_pair_for_voting()
-        
-        if card1 and card2:
-            response_data = {
-                'card1': {
-                    'id': card1.id,
-                    'name': card1.name,
-                    'image_uri': card1.get_image_uri(0),
-                    'image_uri_back': card1.get_image_uri(1) if card1.has_multiple_faces() else None,
-                    'has_multiple_faces': card1.has_multiple_faces(),
-                    'has_flippable_faces': card1.has_flippable_faces(),
-                    'rotation_angle': card1.get_rotation_angle()
-                },
-                'card2': {
-                    'id': card2.id,
-                    'name': card2.name,
-                    'image_uri': card2.get_image_uri(0),
-                    'image_uri_back': card2.get_image_uri(1) if card2.has_multiple_faces() else None,
-                    'has_multiple_faces': card2.has_multiple_faces(),
-                    'has_flippable_faces': card2.has_flippable_faces(),
-                    'rotation_angle': card2.get_rotation_angle()
-                }
-            }
-        else:
-            response_data = {'error': 'Not enough cards for voting'}
+        response_data = get_pair_pool().pop() or {'error': 'Not enough cards for voting'}
         
         return JsonResponse(response_data)
         
@@ -102,34 +110,23 @@ def search_card(request):
         if not query:
             return JsonResponse({'error': 'Query is required'}, status=400)
         
+        # Cards already in the cube are answered from the database
+        if 'scryfall.com' not in query:
+            card_id = get_search_index().exact(query)
+            card = Card.objects.filter(id=card_id).first() if card_id else None
+            if card:
+                return JsonResponse({'card': card.get_scryfall_data(), 'existed': True})
+        
         # Check if it's a Scryfall URL
         if 'scryfall.com' in query:
-            # Extract card path from URL
-            if '/card/' in query:
-                parts = query.split('/card/')
-                if len(parts) > 1:
-                    # Get everything after /card/ and remove any query parameters
-                    full_path = parts[1].split('?')[0]
-                    # Split by '/' and take only set and collector number (first 2 parts)
-                    path_parts = full_path.split('/')
-                    if len(path_parts) >= 2:
-                        card_path = f"{path_parts[0]}/{path_parts[1]}"
-                        response = requests.get(f'https://api.scryfall.com/cards/{card_path}')
-                    else:
-                        return JsonResponse({'error': 'Invalid Scryfall URL format'}, status=400)
-                else:
-                    return JsonResponse({'error': 'Invalid Scryfall URL'}, status=400)
-            else:
+            if not parse_card_url(query):
                 return JsonResponse({'error': 'Invalid Scryfall URL format'}, status=400)
+            card_data = get_client().card_by_url(query)
         else:
-            # Search by name
-            response = requests.get('https://api.scryfall.com/cards/named', params={'exact': query})
-            if response.status_code == 404:
-                # Try fuzzy search
-                response = requests.get('https://api.scryfall.com/cards/named', params={'fuzzy': query})
+            # Search by name, falling back to fuzzy search
+            card_data = get_client().card_by_name(query)
         
-        if response.status_code == 200:
-            card_data = response.json()
+        if card_data:
             return JsonResponse({'card': card_data})
         else:
             return JsonResponse({'error': 'Card not found'}, status=404)
@@ -182,105 +179,110 @@ def bulk_add_cards(request):
         
         lines = [line.strip() for line in card_list.split('\n') if line.strip()]
         
-        results = {
-            'total': len(lines),
-            'added': 0,
-            'existed': 0,
-            'errors': 0,
-            'error_details': []
-        }
+        job = enqueue_import(lines)
+        if getattr(settings, 'BACKGROUND_IMPORTS', False):
+            # Hand the list to the run_import_jobs worker; the page polls import_job_status
+            return JsonResponse(job.get_progress(), status=202)
         
-        for line in lines:
-            try:
-                # Determine if it's a URL or card name
-                if 'scryfall.com' in line:
-                    card_data = search_card_by_url_internal(line)
-                else:
-                    card_data = search_card_by_name_internal(line)
-                
-                if card_data:
-                    # Check if card already exists
-                    existing_card = Card.objects.filter(scryfall_id=card_data['id']).first()
-                    if existing_card:
-                        results['existed'] += 1
-                    else:
-                        # Create new card
-                        Card.objects.create(
-                            name=card_data['name'],
-                            scryfall_id=card_data['id'],
-                            image_uris=card_data.get('image_uris', {}),
-                            card_faces=card_data.get('card_faces', []),
-                            layout=card_data.get('layout', 'normal')
-                        )
-                        results['added'] += 1
-                else:
-                    results['errors'] += 1
-                    results['error_details'].append(f"Card not found: {line}")
-                    
-            except Exception as e:
-                results['errors'] += 1
-                results['error_details'].append(f"Error processing '{line}': {str(e)}")
-        
-        return JsonResponse(results)
+        job = run_import_job(job)
+        return JsonResponse(job.get_progress())
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
 
-def search_card_by_url_internal(url):
-    """Internal function to search card by URL"""
-    try:
-        if '/card/' in url:
-            parts = url.split('/card/')
-            if len(parts) > 1:
-                full_path = parts[1].split('?')[0]
-                path_parts = full_path.split('/')
-                if len(path_parts) >= 2:
-                    card_path = f"{path_parts[0]}/{path_parts[1]}"
-                    response = requests.get(f'https://api.scryfall.com/cards/{card_path}')
-                    if response.status_code == 200:
-                        return response.json()
-        return None
-    except:
-        return None
-
-
-def search_card_by_name_internal(name):
-    """Internal function to search card by name"""
-    try:
-        # Try exact match first
-        response = requests.get('https://api.scryfall.com/cards/named', params={'exact': name})
-        if response.status_code == 200:
-            return response.json()
-        
-        # Try fuzzy search
-        response = requests.get('https://api.scryfall.com/cards/named', params={'fuzzy': name})
-        if response.status_code == 200:
-            return response.json()
-        
-        return None
-    except:
-        return None
+@require_http_methods(["GET"])
+def import_job_status(request, job_id):
+    """Progress of a bulk import job"""
+    job = get_object_or_404(ImportJob, id=job_id)
+    return JsonResponse(job.get_progress())
+
 
+STANDINGS_PAGE_SIZE = 100
 
+
+def get_standings_page(after, limit):
+    """Rows for one page of standings as (rank, card) pairs, plus the cursor of the next page"""
+    entries, next_cursor = get_standings().page(after=after, limit=limit)
+    cards = Card.objects.only(*Card.PAYLOAD_FIELDS).in_bulk([card_id for _, card_id in entries])
+    rows = [(rank, cards[card_id]) for rank, card_id in entries if card_id in cards]
+    return rows, next_cursor
+
+
+@cache_page_until_write(STANDINGS)
 def standings(request):
-    """Standings page showing all cards sorted by rating"""
-    cards = Card.objects.all().order_by('-rating', 'rating_deviation')
+    """Standings page showing cards sorted by rating, one page at a time"""
+    after = request.GET.get('after') or None
+    
+    try:
+        rows, next_cursor = get_standings_page(after, STANDINGS_PAGE_SIZE)
+    except ValueError:
+        rows, next_cursor = get_standings_page(None, STANDINGS_PAGE_SIZE)
+        after = None
     
     context = {
-        'cards': cards
+        'rows': rows,
+        'next_cursor': next_cursor,
+        'is_first_page': after is None
     }
     return render(request, 'cards/standings.html', context)
 
 
+@cache_page_until_write(STANDINGS)
+def standings_data(request):
+    """JSON standings, paginated with ?after=<cursor>&limit=<n>"""
+    after = request.GET.get('after') or None
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', STANDINGS_PAGE_SIZE)), 1), 500)
+        rows, next_cursor = get_standings_page(after, limit)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    results = [
+        {
+            'rank': rank,
+            'rating': card.rating,
+            'rating_deviation': card.rating_deviation,
+            'volatility': card.volatility,
+            **card.get_vote_payload()
+        }
+        for rank, card in rows
+    ]
+    return JsonResponse({'results': results, 'next': next_cursor})
+
+
+TYPEAHEAD_LIMIT = 10
+# Diagnostics lists more matches than the typeahead, best match first
+DIAGNOSTICS_SEARCH_LIMIT = 100
+
+
+@require_http_methods(["GET"])
+def card_typeahead(request):
+    """Top matches among cube cards for a partial card name"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', TYPEAHEAD_LIMIT)), 1), 50)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    
+    card_ids = search_cards(query, limit=limit) if query else []
+    names = dict(Card.objects.filter(id__in=card_ids).values_list('id', 'name'))
+    return JsonResponse({
+        'results': [{'id': card_id, 'name': names[card_id]} for card_id in card_ids if card_id in names]
+    })
+
+
 def diagnostics(request):
     """Hidden diagnostics page for card management"""
     context = {}
     
     search_query = request.GET.get('search', '')
     if search_query:
-        cards = Card.objects.filter(name__icontains=search_query).order_by('name')
-        context['cards'] = cards
+        # Same index as the typeahead: substring and misspelled matches, best first
+        card_ids = search_cards(search_query, limit=DIAGNOSTICS_SEARCH_LIMIT)
+        cards_by_id = Card.objects.in_bulk(card_ids)
+        context['cards'] = [cards_by_id[card_id] for card_id in card_ids if card_id in cards_by_id]
         context['search_query'] = search_query
     
     return render(request, 'cards/diagnostics.html', context)
@@ -316,6 +318,7 @@ def update_card(request):
             return JsonResponse({'error': 'Invalid field'}, status=400)
         
         card.save()
+        get_pair_pool().invalidate(card.id)
         return JsonResponse({'success': True, 'message': f'Updated {field} successfully'})
         
     except ValueError as e:
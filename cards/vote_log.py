@@ -0,0 +1,121 @@
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+
+PAIR_TOKEN_SALT = 'cards.vote_log.pair'
+
+
+def make_pair_token(card1_id, card2_id):
+    """Signed token identifying the pair of cards that was served to a voter"""
+    low, high = sorted((card1_id, card2_id))
+    return signing.Signer(salt=PAIR_TOKEN_SALT).sign(f'{low}-{high}')
+
+
+def pair_token_matches(token, winner_id, loser_id):
+    """Check that a token was issued by us for exactly this pair of cards"""
+    try:
+        value = signing.Signer(salt=PAIR_TOKEN_SALT).unsign(token)
+    except signing.BadSignature:
+        return False
+    try:
+        low, high = sorted((int(winner_id), int(loser_id)))
+    except (TypeError, ValueError):
+        return False
+    return value == f'{low}-{high}'
+
+
+class VoteLog:
+    """
+    Buffered append path for the vote log.
+
+    Votes are collected in memory and written with a single bulk_create once
+    `batch_size` votes are waiting or the oldest has waited `max_delay` seconds
+    (a timer thread flushes a partial batch that no later vote arrives to push
+    out). With the default batch size of 1 every vote is written immediately;
+    raise VOTE_LOG_BATCH_SIZE under load to trade a little durability for far
+    fewer INSERTs: a killed process loses at most `max_delay` seconds of votes.
+    Anything still buffered is also flushed at interpreter exit.
+    """
+
+    def __init__(self, batch_size=1, max_delay=5.0):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.oldest = None
+        self.timer = None
+        atexit.register(self.flush)
+
+    def append(self, winner_id, loser_id, voter_key='', pair_token='', applied=True):
+        """Queue a vote for writing, flushing if the buffer is full or stale"""
+        from .models import Vote
+
+        vote = Vote(
+            winner_id=winner_id, loser_id=loser_id, voter_key=voter_key or '', pair_token=pair_token or '',
+            applied=applied,
+        )
+        with self.lock:
+            self.buffer.append(vote)
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            if len(self.buffer) < self.batch_size and time.monotonic() - self.oldest < self.max_delay:
+                self._schedule()
+                return vote
+            pending = self._take()
+        self._write(pending)
+        return vote
+
+    def flush(self):
+        """Write everything currently buffered"""
+        with self.lock:
+            pending = self._take()
+        self._write(pending)
+
+    def _schedule(self):
+        """Start the timer that flushes the buffer `max_delay` seconds after its oldest vote"""
+        if self.timer is None:
+            delay = max(self.max_delay - (time.monotonic() - self.oldest), 0)
+            self.timer = threading.Timer(delay, self._flush_on_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _flush_on_timer(self):
+        from django.db import connection
+
+        with self.lock:
+            self.timer = None
+            pending = self._take()
+        try:
+            self._write(pending)
+        finally:
+            # The timer thread has its own database connection; don't leak it
+            connection.close()
+
+    def _take(self):
+        pending = self.buffer
+        self.buffer = []
+        self.oldest = None
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        return pending
+
+    def _write(self, pending):
+        from .models import Vote
+
+        if pending:
+            Vote.objects.bulk_create(pending, batch_size=500)
+
+
+_vote_log = VoteLog(
+    batch_size=getattr(settings, 'VOTE_LOG_BATCH_SIZE', 1),
+    max_delay=getattr(settings, 'VOTE_LOG_MAX_DELAY', 5.0),
+)
+
+
+def get_vote_log():
+    """Return the process-wide vote log"""
+    return _vote_log
@@ -0,0 +1,32 @@
+from django.db import transaction
+
+from .rating_periods import apply_rating_period
+
+
+def process_pending_votes(batch_size=1000):
+    """
+    Apply up to batch_size queued votes as a single rating period.
+
+    Pending votes are claimed with SELECT ... FOR UPDATE SKIP LOCKED where the
+    database supports it, so several workers can drain the queue at once
+    without applying a vote twice.
+
+    Returns:
+        int: number of votes applied
+    """
+    from .models import Vote
+
+    with transaction.atomic():
+        pending = list(
+            Vote.objects.select_for_update(skip_locked=True)
+            .filter(applied=False)
+            .order_by('id')
+            .values_list('id', 'winner_id', 'loser_id')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        apply_rating_period((winner_id, loser_id) for _, winner_id, loser_id in pending)
+        Vote.objects.filter(id__in=[vote_id for vote_id, _, _ in pending]).update(applied=True)
+
+    return len(pending)
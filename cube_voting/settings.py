@@ -86,6 +86,10 @@ DATABASES = {
     )
 }
 
+# pg_trgm lookups for card search (see cards.search); the app needs psycopg, so only on PostgreSQL
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    INSTALLED_APPS.append('django.contrib.postgres')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -142,6 +146,53 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Queue votes instead of applying them inside the request; requires a `process_votes` worker
+VOTE_QUEUE = os.getenv('VOTE_QUEUE', 'False') == 'True'
+
+# Pair selection: 'random' (weighted by RD) or 'information' (close ratings, high combined RD)
+MATCHMAKING_MODE = os.getenv('MATCHMAKING_MODE', 'random')
+# Opponents considered on either side in 'information' mode; must be at least 1
+MATCHMAKING_WINDOW = int(os.getenv('MATCHMAKING_WINDOW', '16'))
+
+# Number of pre-sampled voting pairs kept in memory per worker (0 disables the pool)
+PAIR_POOL_SIZE = int(os.getenv('PAIR_POOL_SIZE', '50'))
+PAIR_POOL_LOW_WATER = int(os.getenv('PAIR_POOL_LOW_WATER', '10'))
+
+# Vote log: number of votes to buffer before a bulk insert, and the longest a vote may wait
+VOTE_LOG_BATCH_SIZE = int(os.getenv('VOTE_LOG_BATCH_SIZE', '1'))
+VOTE_LOG_MAX_DELAY = float(os.getenv('VOTE_LOG_MAX_DELAY', '5'))
+
+# Scryfall lookups: answer from the local bulk-data index (see `import_scryfall_bulk`) before
+# going to the network, and optionally never go to the network at all
+SCRYFALL_LOCAL_INDEX = os.getenv('SCRYFALL_LOCAL_INDEX', 'True') == 'True'
+SCRYFALL_OFFLINE = os.getenv('SCRYFALL_OFFLINE', 'False') == 'True'
+
+# On-disk cache of Scryfall API responses (empty path disables it); entries are revalidated after the TTL
+SCRYFALL_CACHE_PATH = os.getenv('SCRYFALL_CACHE_PATH', str(BASE_DIR / 'scryfall_cache.sqlite3'))
+SCRYFALL_CACHE_TTL = int(os.getenv('SCRYFALL_CACHE_TTL', '86400'))
+SCRYFALL_CACHE_MAX_ENTRIES = int(os.getenv('SCRYFALL_CACHE_MAX_ENTRIES', '20000'))
+
+# Run bulk card imports on the `run_import_jobs` worker instead of inside the request
+# (only enable this where the worker is running, or queued imports never finish)
+BACKGROUND_IMPORTS = os.getenv('BACKGROUND_IMPORTS', 'False') == 'True'
+
+# Cache: 'locmem' (per process, the default), 'file' or 'redis' (shared between processes)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'cube-voting'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', os.getenv('REDIS_URL', 'redis://localhost:6379')),
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+    }
+}
+
+# Longest a cached page (landing, standings) is served without a write invalidating it
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '60'))
+
 # CORS settings for kernels frontend
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
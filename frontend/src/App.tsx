@@ -17,9 +17,14 @@ import CandidateBank from './components/CandidateBank';
 import CardComponent from './components/CardComponent';
 import './App.css';
 
+// The server's default candidate page size
+const CANDIDATE_PAGE_SIZE = 100;
+
 function App() {
   const [kernels, setKernels] = useState<Kernel[]>([]);
   const [candidates, setCandidates] = useState<CandidateCard[]>([]);
+  const [candidateCount, setCandidateCount] = useState(0);
+  const [candidatesNext, setCandidatesNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [activeCard, setActiveCard] = useState<Card | null>(null);
 
@@ -41,12 +46,14 @@ function App() {
   const loadData = async () => {
     try {
       const [kernelsResponse, candidatesResponse] = await Promise.all([
-        kernelAPI.getAll(),
-        candidateAPI.getAll(),
+        kernelAPI.getAll('thumb'),
+        candidateAPI.getPage('thumb'),
       ]);
       
       setKernels(kernelsResponse.data);
-      setCandidates(candidatesResponse.data);
+      setCandidates(candidatesResponse.data.results);
+      setCandidateCount(candidatesResponse.data.count ?? 0);
+      setCandidatesNext(candidatesResponse.data.next);
     } catch (error) {
       console.error('Failed to load data:', error);
     } finally {
@@ -54,6 +61,39 @@ function App() {
     }
   };
 
+  const loadKernels = async () => {
+    const response = await kernelAPI.getAll('thumb');
+    setKernels(response.data);
+  };
+
+  // Re-fetch the first `loaded` candidates, so the pages already scrolled in stay in the bank
+  const reloadCandidates = async (loaded: number) => {
+    let response = await candidateAPI.getPage('thumb', { limit: Math.max(loaded, CANDIDATE_PAGE_SIZE) });
+    const count = response.data.count ?? 0;
+    let results = response.data.results;
+    while (response.data.next && results.length < loaded) {
+      response = await candidateAPI.getNextPage(response.data.next);
+      results = [...results, ...response.data.results];
+    }
+    setCandidates(results);
+    setCandidateCount(count);
+    setCandidatesNext(response.data.next);
+  };
+
+  const loadMoreCandidates = async () => {
+    if (!candidatesNext) return;
+    const next = candidatesNext;
+    setCandidatesNext(null);  // don't request the same page twice while this one loads
+    try {
+      const response = await candidateAPI.getNextPage(next);
+      setCandidates(current => [...current, ...response.data.results]);
+      setCandidatesNext(response.data.next);
+    } catch (error) {
+      console.error('Failed to load more candidates:', error);
+      setCandidatesNext(next);
+    }
+  };
+
   const handleDragStart = (event: DragStartEvent) => {
     const { active } = event;
     const cardData = active.data.current;
@@ -75,7 +115,8 @@ function App() {
     // Handle card movement
     if (!activeData?.card) return;
 
-    const card = activeData.card;
+    // A drag carries one card; moves are sent as a list all the same
+    const cards: Card[] = [activeData.card];
     const overType = overData?.type;
 
     try {
@@ -84,20 +125,26 @@ function App() {
         
         if (!targetKernel) return;
         
-        // Move card to kernel
-        await candidateAPI.moveToKernel(card.id, targetKernel.id);
+        // Move the cards to the kernel
+        await kernelAPI.moveCards(cards.map(card => ({ card_id: card.id, kernel_id: targetKernel.id })));
         
-        // Refresh data
-        await loadData();
+        // Drop them from the loaded candidates rather than reloading the bank
+        const moved = new Set(cards.map(card => card.id));
+        const removed = candidates.filter(candidate => moved.has(candidate.card.id)).length;
+        setCandidates(current => current.filter(candidate => !moved.has(candidate.card.id)));
+        setCandidateCount(count => count - removed);
+        await loadKernels();
       } else if (overType === 'candidate-bank') {
-        // If card is being moved from a kernel back to candidates
-        const sourceKernelMatch = kernels.find(k => 
-          k.cards.some(kc => kc.card.id === card.id)
-        );
+        // Only cards being moved from a kernel back to candidates
+        const inKernels = new Set(kernels.flatMap(k => k.cards.map(kc => kc.card.id)));
+        const moves = cards
+          .filter(card => inKernels.has(card.id))
+          .map(card => ({ card_id: card.id, kernel_id: null }));
         
-        if (sourceKernelMatch) {
-          await kernelAPI.removeCard(sourceKernelMatch.id, card.id);
-          await loadData();
+        if (moves.length > 0) {
+          await kernelAPI.moveCards(moves);
+          // Returned cards slot in by sort order, so re-fetch the range already loaded
+          await Promise.all([loadKernels(), reloadCandidates(candidates.length + moves.length)]);
         }
       }
     } catch (error) {
@@ -131,7 +178,12 @@ function App() {
           onKernelsChange={setKernels}
           onRefreshData={loadData}
         />
-        <CandidateBank candidates={candidates} />
+        <CandidateBank
+          candidates={candidates}
+          total={candidateCount}
+          hasMore={candidatesNext !== null}
+          onLoadMore={loadMoreCandidates}
+        />
       </div>
       
       <DragOverlay>
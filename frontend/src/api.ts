@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Card, Kernel, CandidateCard } from './types';
+import { Card, Kernel, CandidateCard, CardMove, CardView, Page } from './types';
 
 const API_BASE_URL = 'http://localhost:8002/api';
 
@@ -19,8 +19,8 @@ export const cardAPI = {
 };
 
 export const kernelAPI = {
-  getAll: () => api.get<Kernel[]>('/kernels/'),
-  get: (id: number) => api.get<Kernel>(`/kernels/${id}/`),
+  getAll: (view: CardView = 'full') => api.get<Kernel[]>('/kernels/', { params: { view } }),
+  get: (id: number, view: CardView = 'full') => api.get<Kernel>(`/kernels/${id}/`, { params: { view } }),
   create: (kernel: Partial<Kernel>) => api.post<Kernel>('/kernels/', kernel),
   update: (id: number, kernel: Partial<Kernel>) => api.put<Kernel>(`/kernels/${id}/`, kernel),
   delete: (id: number) => api.delete(`/kernels/${id}/`),
@@ -28,12 +28,22 @@ export const kernelAPI = {
     api.post(`/kernels/${kernelId}/add_card/`, { card_id: cardId }),
   removeCard: (kernelId: number, cardId: number) => 
     api.post(`/kernels/${kernelId}/remove_card/`, { card_id: cardId }),
+  // Apply many moves (e.g. a multi-select drag) in one atomic request
+  moveCards: (moves: CardMove[]) =>
+    api.post<{ success: boolean; moved: number }>('/kernels/move_cards/', { moves }),
+  // Place one kernel right after another (null: first)
+  move: (kernelId: number, afterId: number | null) =>
+    api.post<{ success: boolean; order: number }>(`/kernels/${kernelId}/move/`, { after_id: afterId }),
   reorder: (kernelIds: number[]) => 
     api.post('/kernels/reorder/', { kernel_ids: kernelIds }),
 };
 
 export const candidateAPI = {
-  getAll: () => api.get<CandidateCard[]>('/candidates/'),
+  // First page of candidates; filters: color_identity (e.g. 'WU', 'C'), cmc, cmc_min, cmc_max, type
+  getPage: (view: CardView = 'full', filters: Record<string, string | number> = {}) =>
+    api.get<Page<CandidateCard>>('/candidates/', { params: { view, ...filters } }),
+  // A following page, from the `next` URL of the previous one
+  getNextPage: (next: string) => api.get<Page<CandidateCard>>(next),
   moveToKernel: (cardId: number, kernelId: number) => 
     api.post('/candidates/move_to_kernel/', { card_id: cardId, kernel_id: kernelId }),
 };
@@ -5,9 +5,12 @@ import CardComponent from './CardComponent';
 
 interface CandidateBankProps {
   candidates: CandidateCard[];
+  total: number;
+  hasMore: boolean;
+  onLoadMore: () => void;
 }
 
-const CandidateBank: React.FC<CandidateBankProps> = ({ candidates }) => {
+const CandidateBank: React.FC<CandidateBankProps> = ({ candidates, total, hasMore, onLoadMore }) => {
   const scrollContainerRef = useRef<HTMLDivElement>(null);
   
   const { setNodeRef, isOver } = useDroppable({
@@ -40,6 +43,20 @@ const CandidateBank: React.FC<CandidateBankProps> = ({ candidates }) => {
     };
   }, []);
 
+  // Fetch the next page of candidates when scrolled close to the end
+  const handleScroll = () => {
+    const container = scrollContainerRef.current;
+    if (!container || !hasMore) return;
+    if (container.scrollLeft + container.clientWidth >= container.scrollWidth - 1000) {
+      onLoadMore();
+    }
+  };
+
+  // Keep loading until the visible area is filled
+  useEffect(() => {
+    handleScroll();
+  });
+
   return (
     <div
       ref={setNodeRef}
@@ -52,11 +69,12 @@ const CandidateBank: React.FC<CandidateBankProps> = ({ candidates }) => {
       }}
     >
       <h2 style={{ margin: '0 0 16px 0' }}>
-        Candidates ({candidates.length})
+        Candidates ({total})
       </h2>
       
       <div
         ref={scrollContainerRef}
+        onScroll={handleScroll}
         style={{
           height: 'calc(100% - 60px)',
           overflowX: 'auto',
@@ -24,6 +24,11 @@ const CardComponent: React.FC<CardComponentProps> = ({
       return `http://localhost:8002/media/images/${card.image_filename}`;
     }
     
+    // Thumbnail view: the image URL is already resolved by the server
+    if (card.image_uri) {
+      return card.image_uri;
+    }
+    
     // Then try image_uris from target app
     if (card.image_uris && card.image_uris.normal) {
       return card.image_uris.normal;
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useDroppable } from '@dnd-kit/core';
-import { Kernel } from '../types';
+import { Card, Kernel } from '../types';
 import CardComponent from './CardComponent';
 import { kernelAPI } from '../api';
 
@@ -18,12 +18,31 @@ const KernelModal: React.FC<KernelModalProps> = ({ kernel, onClose, onUpdate, on
   const [hovering, setHovering] = useState(false);
   const [fadeTimer, setFadeTimer] = useState<NodeJS.Timeout | null>(null);
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
+  const [fullCards, setFullCards] = useState<Record<number, Card>>({});
 
   const { setNodeRef, isOver } = useDroppable({
     id: `kernel-modal-${kernel.id}`,
     data: { kernel, type: 'kernel-modal' }
   });
 
+  // The kernels list only carries thumbnails; load full card details for the open kernel
+  useEffect(() => {
+    let cancelled = false;
+    kernelAPI.get(kernel.id, 'full')
+      .then((response) => {
+        if (cancelled) return;
+        const cards: Record<number, Card> = {};
+        response.data.cards.forEach((kernelCard) => {
+          cards[kernelCard.card.id] = kernelCard.card;
+        });
+        setFullCards(cards);
+      })
+      .catch((error) => console.error('Failed to load kernel cards:', error));
+    return () => {
+      cancelled = true;
+    };
+  }, [kernel.id, kernel.cards]);
+
   useEffect(() => {
     if (hovering) {
       if (fadeTimer) {
@@ -226,7 +245,7 @@ const KernelModal: React.FC<KernelModalProps> = ({ kernel, onClose, onUpdate, on
             {kernel.cards.map((kernelCard) => (
               <CardComponent
                 key={kernelCard.id}
-                card={kernelCard.card}
+                card={fullCards[kernelCard.card.id] || kernelCard.card}
                 dragId={`modal-${kernel.id}-card-${kernelCard.card.id}`}
               />
             ))}
@@ -85,9 +85,9 @@ const KernelsBank: React.FC<KernelsBankProps> = ({ kernels, onKernelsChange, onR
     onKernelsChange(newKernels);
 
     try {
-      // Send new order to server
-      const kernelIds = newKernels.map(k => k.id);
-      await kernelAPI.reorder(kernelIds);
+      // Send the move to the server; only the moved kernel's row is rewritten
+      const afterId = newIndex > 0 ? newKernels[newIndex - 1].id : null;
+      await kernelAPI.move(kernelId, afterId);
     } catch (error) {
       console.error('Failed to reorder kernels:', error);
       // Revert on error
@@ -1,7 +1,11 @@
+// Serializer profile for cards returned by the API: 'thumb' is just enough to draw the image
+export type CardView = 'thumb' | 'full';
+
 export interface Card {
   id: number;
-  scryfall_id: string;
+  scryfall_id?: string;
   name: string;
+  image_uri?: string;  // thumb view only
   mana_cost?: string;
   cmc?: number;
   type_line?: string;
@@ -57,4 +61,17 @@ export interface Kernel {
 export interface CandidateCard {
   id: number;
   card: Card;
+}
+
+// One card's destination for kernelAPI.moveCards; a null kernel_id means the candidates
+export interface CardMove {
+  card_id: number;
+  kernel_id: number | null;
+}
+
+// One page of a cursor-paginated list; `next` is the URL of the following page
+export interface Page<T> {
+  count: number | null;  // only on the first page
+  next: string | null;
+  results: T[];
 }
\ No newline at end of file